@@ -0,0 +1,105 @@
+"""
+Prewarm micro-benchmark: a curl_cffi session is warmed and its first real request is
+sent from the same thread (what Prewarmer does) or from another one. curl_cffi keeps a
+curl handle per thread, so only the first reuses the warmed connection. Reports new
+connections the server saw and time to first byte.
+
+    python -m benchmarks.prewarm --rounds 50 --connect-delay 0.05
+
+--connect-delay is added to every new connection by the local server to stand in for
+DNS, TCP and TLS setup through a proxy.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curl_cffi import requests
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, connect_delay: float):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request_thread(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        time.sleep(self.connect_delay)
+        super().process_request_thread(request, client_address)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(b"{}")
+
+    do_GET = do_HEAD = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(server: CountingServer, url: str, rounds: int, warm: bool, same_thread: bool) -> tuple[float, float]:
+    """New connections opened by the first real request and its mean time to first byte in ms"""
+    runner = ThreadPoolExecutor(1)
+    warmer = runner if same_thread else ThreadPoolExecutor(1)
+    opened = 0
+    ttfb = 0.0
+    for _ in range(rounds):
+        session = requests.Session()
+        if warm:
+            warmer.submit(session.request, "HEAD", url).result()
+        connections = server.connections
+
+        def first_request() -> float:
+            start = time.perf_counter()
+            session.get(url)
+            return time.perf_counter() - start
+
+        ttfb += runner.submit(first_request).result()
+        opened += server.connections - connections
+        session.close()
+    warmer.shutdown()
+    runner.shutdown()
+    return opened / rounds, ttfb / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = CountingServer(args.connect_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print(f"{'session':<40} {'new connections':>16} {'TTFB ms':>9}")
+    for name, warm, same_thread in (
+        ("cold", False, True),
+        ("warmed on another thread", True, False),
+        ("warmed on the thread that runs it", True, True),
+    ):
+        opened, ttfb = run(server, url, args.rounds, warm, same_thread)
+        print(f"{name:<40} {opened:>16.2f} {ttfb:>9.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Signing micro-benchmark: the old per-call path (key parsed from hex every time, a new
+Web3() per message) against model.signer.Signer with both backends. Byte equality
+with eth_account is checked by tests/test_signer.py.
+
+    python -m benchmarks.signing --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account.messages import encode_defunct
+from web3 import Web3
+
+from model.signer import Signer
+
+CLAIM_CONTRACT = "0x7bb85350e3a883A1708648AB7e37cEf4651cFd48"
+CHALLENGE = "Welcome to Xterio!\n\nNonce: 0123456789abcdef"
+
+
+def claim_transaction(address: str, nonce: int) -> dict:
+    return {
+        "chainId": 112358,
+        "from": address,
+        "to": Web3.to_checksum_address(CLAIM_CONTRACT),
+        "value": 0,
+        "data": "0xdc7d41f6" + hex(18)[2:].zfill(64) + hex(1)[2:].zfill(64),
+        "nonce": nonce,
+        "type": "0x2",
+        "maxFeePerGas": 2_000_000_252,
+        "maxPriorityFeePerGas": 2_000_000,
+        "gas": 91_000,
+    }
+
+
+def bench(name: str, iterations: int, func):
+    func(0)
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<36} {elapsed / iterations * 1_000_000:>9.1f} us/op {iterations / elapsed:>10.0f} op/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    private_key = "0x" + os.urandom(32).hex()
+    w3 = Web3()
+    signer = Signer(private_key)
+    eth_keys_signer = Signer(private_key)
+    eth_keys_signer._coincurve_key = None
+
+    print(f"Signer backend: {signer.backend}\n")
+
+    bench(
+        "transaction: w3.eth.account (hex key)",
+        args.iterations,
+        lambda i: w3.eth.account.sign_transaction(claim_transaction(signer.address, i), private_key),
+    )
+    bench(
+        "transaction: Signer (eth_keys)",
+        args.iterations,
+        lambda i: eth_keys_signer.sign_transaction(claim_transaction(signer.address, i)),
+    )
+    if signer.backend == "coincurve":
+        bench(
+            "transaction: Signer (coincurve)",
+            args.iterations,
+            lambda i: signer.sign_transaction(claim_transaction(signer.address, i)),
+        )
+
+    print()
+    bench(
+        "message: Web3().eth.account (hex key)",
+        args.iterations,
+        lambda i: Web3().eth.account.sign_message(encode_defunct(text=CHALLENGE), private_key=private_key),
+    )
+    bench("message: Signer (eth_keys)", args.iterations, lambda i: eth_keys_signer.sign_message(CHALLENGE))
+    if signer.backend == "coincurve":
+        bench("message: Signer (coincurve)", args.iterations, lambda i: signer.sign_message(CHALLENGE))
+
+
+if __name__ == "__main__":
+    main()
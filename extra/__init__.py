@@ -1,3 +1,6 @@
 from .reader import read_abi, read_config, read_txt_file, no_proxies
 from .output import show_logo, show_dev_info, show_menu
 from .converter import mnemonic_to_private_key
+from . import recorder
+from . import trace
+from . import memory
@@ -1,9 +1,13 @@
 from curl_cffi import requests
 
+from extra import recorder
 from model.constants import USER_AGENT
 
 
 def create_client(proxy: str) -> requests.Session:
+    if recorder.fixtures:
+        return recorder.ReplaySession(recorder.fixtures)
+
     session = requests.Session(impersonate="chrome124", timeout=120, verify=False)
 
     if proxy:
@@ -16,6 +20,8 @@ def create_client(proxy: str) -> requests.Session:
 
     session.headers.update(HEADERS)
 
+    if recorder.recorder:
+        return recorder.RecordingSession(session, recorder.recorder)
     return session
 
 
@@ -0,0 +1,120 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from loguru import logger
+
+
+class EventLog:
+    """
+    Structured run log. Events are put on a queue by the workers and written as
+    JSON lines by a single background thread, so logging never blocks a worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="event-log", daemon=True)
+        self._thread.start()
+
+    def emit(self, event: dict):
+        self._queue.put(event)
+
+    def _writer(self):
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    break
+                file.write(json.dumps(event, default=str) + "\n")
+                if self._queue.empty():
+                    file.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+_log: EventLog | None = None
+_context = threading.local()
+# set by extra.trace while span tracing is on, gets every timed block as a span
+span_hook = None
+
+
+def configure(config: dict) -> str:
+    """Start a new event log from the `event_log` section of config.yaml, returns its path"""
+    global _log
+    settings = config.get("event_log", {})
+    if not settings.get("enabled", True):
+        return ""
+
+    directory = settings.get("dir", "logs")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("run-%Y%m%d-%H%M%S.jsonl"))
+    _log = EventLog(path)
+    logger.info(f"Writing structured event log to {path}")
+    return path
+
+
+def close():
+    global _log
+    if _log:
+        _log.close()
+        _log = None
+
+
+def bind(**fields):
+    """Attach fields (account index, address) to every event emitted from this thread"""
+    _context.fields = fields
+
+
+def context() -> dict:
+    return dict(getattr(_context, "fields", {}))
+
+
+def emit(
+    stage: str,
+    outcome: str,
+    endpoint: str = "",
+    latency: float | None = None,
+    tx_hash: str = "",
+    **fields,
+):
+    if _log is None:
+        return
+
+    event = {"ts": time.time(), **context(), "stage": stage, "outcome": outcome}
+    if endpoint:
+        event["endpoint"] = endpoint
+    if latency is not None:
+        event["latency"] = round(latency, 4)
+    if tx_hash:
+        event["tx_hash"] = tx_hash
+    event.update(fields)
+    _log.emit(event)
+
+
+class timed:
+    """Context manager that emits one event with the latency and outcome of its block"""
+
+    def __init__(self, stage: str, endpoint: str = "", **fields):
+        self.stage = stage
+        self.endpoint = endpoint
+        self.fields = fields
+        self.outcome = "ok"
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.monotonic()
+        if exc_type is not None:
+            self.outcome = "error"
+            self.fields.setdefault("error", exc_type.__name__)
+        emit(self.stage, self.outcome, self.endpoint, end - self.start, **self.fields)
+        if span_hook:
+            span_hook(self.endpoint or self.stage, self.stage, self.start, end, outcome=self.outcome, **self.fields)
+        return False
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+FAILURE_INDEX_PATH = "data/failures.jsonl"
+
+_lock = threading.Lock()
+
+
+def _append(record: dict, path: str):
+    with _lock:
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+def record_failure(account, task: int, stage: str, err: BaseException, path: str = FAILURE_INDEX_PATH):
+    _append(
+        {
+            "ts": time.time(),
+            "outcome": "failed",
+            "private_key": account.private_key,
+            "proxy": account.proxy,
+            "index": account.index,
+            "address": account.address,
+            "task": task,
+            "stage": stage,
+            "bridge_tx": account.bridge_tx,
+            "error_class": type(err).__name__,
+            "error": str(err)[:300],
+        },
+        path,
+    )
+
+
+def record_success(account, task: int, path: str = FAILURE_INDEX_PATH):
+    _append(
+        {
+            "ts": time.time(),
+            "outcome": "succeeded",
+            "private_key": account.private_key,
+            "index": account.index,
+            "task": task,
+        },
+        path,
+    )
+
+
+def unresolved_failures(path: str = FAILURE_INDEX_PATH) -> list[dict]:
+    """Last failure of every account and task that did not succeed later"""
+    if not os.path.exists(path):
+        return []
+
+    latest: dict[tuple[str, int], dict] = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                latest[(record["private_key"], record["task"])] = record
+
+    return [record for record in latest.values() if record["outcome"] == "failed"]
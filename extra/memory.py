@@ -0,0 +1,112 @@
+import gc
+import threading
+import tracemalloc
+import weakref
+
+from loguru import logger
+
+from extra import events
+
+
+class MemoryProfiler:
+    """
+    tracemalloc snapshot every `every` finished accounts, logged as the top allocation
+    sites by growth since the previous snapshot. Finished accounts are also checked for
+    connections that were not closed and for instances that are never freed.
+    """
+
+    def __init__(self, every: int = 50, top: int = 10, frames: int = 5):
+        self.every = max(1, every)
+        self.top = top
+        self.finished = 0
+        self._previous: tracemalloc.Snapshot | None = None
+        self._finished_instances: weakref.WeakSet = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._previous = self._snapshot()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+
+    def account_finished(self, instance):
+        leaked = instance.open_resources()
+        if leaked:
+            logger.warning(f"{instance.address} | Not released after account flow: {', '.join(leaked)}")
+            events.emit("memory", "leak", address=instance.address, resources=leaked)
+
+        with self._lock:
+            self._finished_instances.add(instance)
+            self.finished += 1
+            if self.finished % self.every:
+                return
+            self.report()
+
+    def report(self):
+        gc.collect()
+        alive = len(self._finished_instances)
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        growth = snapshot.compare_to(self._previous, "lineno")[: self.top]
+        self._previous = snapshot
+
+        logger.info(
+            f"Memory after {self.finished} accounts: {current / 2**20:.1f} MiB, "
+            f"peak {peak / 2**20:.1f} MiB, finished accounts still alive: {alive}"
+        )
+        for stat in growth:
+            if stat.size_diff > 0:
+                logger.info(f"    {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks) {stat.traceback[0]}")
+
+        events.emit(
+            "memory",
+            "ok",
+            accounts=self.finished,
+            current_mib=round(current / 2**20, 2),
+            peak_mib=round(peak / 2**20, 2),
+            alive_instances=alive,
+            top_growth=[
+                {"site": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in growth
+            ],
+        )
+
+    def close(self):
+        if self.finished % self.every:
+            self.report()
+        tracemalloc.stop()
+
+
+profiler: MemoryProfiler | None = None
+
+
+def configure(config: dict):
+    """Turn on memory profiling from the `memory_profile` section of config.yaml"""
+    global profiler
+    settings = config.get("memory_profile", {})
+    if settings.get("enabled", False) and profiler is None:
+        profiler = MemoryProfiler(
+            every=settings.get("every", 50),
+            top=settings.get("top", 10),
+            frames=settings.get("frames", 5),
+        )
+        logger.info(f"Memory profiling on, snapshot every {profiler.every} accounts")
+
+
+def account_finished(instance):
+    if profiler:
+        profiler.account_finished(instance)
+
+
+def close():
+    global profiler
+    if profiler:
+        profiler.close()
+        profiler = None
@@ -0,0 +1,218 @@
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable
+from urllib.parse import urlparse
+
+from extra.events import EventLog
+
+# the login challenge path carries the address upper-cased, 0X prefix included
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-f]{40}", re.I)
+
+# request/response fields that never go into fixtures
+SECRET_FIELDS = {
+    "authorization",
+    "sign",
+    "signature",
+    "id_token",
+    "access_token",
+    "h-recaptcha-response",
+}
+SECRET_RPC_METHODS = {"eth_sendRawTransaction"}
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {
+            key: "<redacted>" if key.lower() in SECRET_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def http_key(method: str, url: str) -> str:
+    """Method and path with addresses replaced, so exchanges of any account match"""
+    parsed = urlparse(url)
+    path = ADDRESS_PATTERN.sub("{address}", parsed.path)
+    return f"{method.upper()} {parsed.netloc}{path}"
+
+
+class Recorder:
+    """Writes HTTP and JSON-RPC exchanges of a run as JSON lines, secrets redacted"""
+
+    def __init__(self, path: str):
+        self.started = time.monotonic()
+        self._log = EventLog(path)
+
+    def record_http(self, method: str, url: str, request_json, response, latency: float):
+        try:
+            body = redact(json.loads(response.text))
+        except ValueError:
+            body = response.text
+        self._log.emit(
+            {
+                "kind": "http",
+                "t": round(time.monotonic() - self.started, 4),
+                "key": http_key(method, url),
+                "request": redact(request_json),
+                "status": response.status_code,
+                "body": body,
+                "latency": round(latency, 4),
+            }
+        )
+
+    def record_rpc(self, chain: str, method: str, params, response: dict, latency: float):
+        self._log.emit(
+            {
+                "kind": "rpc",
+                "t": round(time.monotonic() - self.started, 4),
+                "key": f"{chain} {method}",
+                "params": "<redacted>" if method in SECRET_RPC_METHODS else params,
+                "response": redact(response),
+                "latency": round(latency, 4),
+            }
+        )
+
+    def record_value(self, key: str, value, latency: float):
+        self._log.emit(
+            {
+                "kind": "value",
+                "t": round(time.monotonic() - self.started, 4),
+                "key": key,
+                "value": value,
+                "latency": round(latency, 4),
+            }
+        )
+
+    def close(self):
+        self._log.close()
+
+
+class RecordingSession:
+    """Wraps a curl_cffi session and records everything it sends"""
+
+    def __init__(self, session, recorder: Recorder):
+        self._session = session
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def request(self, method: str, url: str, **kwargs):
+        start = time.monotonic()
+        response = self._session.request(method, url, **kwargs)
+        self._recorder.record_http(method, url, kwargs.get("json"), response, time.monotonic() - start)
+        return response
+
+
+class ReplayResponse:
+    def __init__(self, status_code: int, body):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+        self.content = self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class Fixtures:
+    """
+    Recorded exchanges grouped by key and played back in recorded order. When a key
+    runs out its last exchange is repeated, so a fixture of a few accounts can drive
+    a run of many.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.speed = speed
+        self._entries: dict[str, deque] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def next(self, key: str) -> dict:
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            entry = self._last.get(key)
+        if entry is None:
+            raise KeyError(f"No recorded exchange for {key}")
+        if self.speed > 0:
+            time.sleep(entry["latency"] / self.speed)
+        return entry
+
+
+class ReplaySession:
+    """Stands in for the curl_cffi session of an account during replay"""
+
+    def __init__(self, fixtures: Fixtures):
+        self._fixtures = fixtures
+        self.headers: dict = {}
+        self.proxies: dict = {}
+
+    def request(self, method: str, url: str, **kwargs):
+        entry = self._fixtures.next(http_key(method, url))
+        return ReplayResponse(entry["status"], entry["body"])
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        pass
+
+
+recorder: Recorder | None = None
+fixtures: Fixtures | None = None
+
+# keys of calls that go through their own clients instead of the account session
+CAPTCHA_KEY = "captcha hcaptcha"
+OPENAI_KEY = "openai chat"
+
+
+def stubbed(key: str, call: Callable, secret: bool = False):
+    """
+    Result of an external call made by its own client (captcha solver, OpenAI). It is
+    recorded like an HTTP exchange and played back from fixtures during replay, so a
+    replay never reaches the real service. A secret result is recorded as a placeholder.
+    """
+    if fixtures:
+        return fixtures.next(key)["value"]
+
+    start = time.monotonic()
+    value = call()
+    if recorder:
+        recorder.record_value(key, "<redacted>" if secret and value else value, time.monotonic() - start)
+    return value
+
+
+def configure(config: dict):
+    """Turn on recording or replay from the `record` section of config.yaml"""
+    global recorder, fixtures
+    settings = config.get("record", {})
+    mode = settings.get("mode", "off")
+    path = settings.get("path", "data/fixtures.jsonl")
+
+    if mode == "record":
+        recorder = Recorder(path)
+    elif mode == "replay":
+        fixtures = Fixtures(path, speed=settings.get("speed", 1.0))
+
+
+def close():
+    global recorder
+    if recorder:
+        recorder.close()
+        recorder = None
@@ -0,0 +1,92 @@
+import json
+from collections import defaultdict
+
+# outcomes that count as failures. Anything else (ok, sent, deferred, skipped) is not one
+FAILED_OUTCOMES = ("failed", "error", "reverted")
+# steps whose result is reported by a later event, left out of the success rate
+PENDING_OUTCOMES = ("sent", "deferred")
+
+
+def is_failure(event: dict) -> bool:
+    return event["outcome"] in FAILED_OUTCOMES
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(path: str) -> dict:
+    """Roll an event log up into counts, success rates and latencies per stage and endpoint"""
+    stages = defaultdict(lambda: {"total": 0, "ok": 0, "pending": 0, "latencies": [], "errors": defaultdict(int)})
+    endpoints = defaultdict(lambda: {"total": 0, "ok": 0, "latencies": []})
+    accounts = set()
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if "account" in event:
+                accounts.add(event["account"])
+
+            ok = not is_failure(event)
+            stage = stages[event["stage"]]
+            if "latency" in event:
+                stage["latencies"].append(event["latency"])
+            if event["outcome"] in PENDING_OUTCOMES:
+                stage["pending"] += 1
+                continue
+            stage["total"] += 1
+            stage["ok"] += ok
+            if not ok:
+                stage["errors"][event.get("error", event["outcome"])] += 1
+
+            if event.get("endpoint"):
+                endpoint = endpoints[event["endpoint"]]
+                endpoint["total"] += 1
+                endpoint["ok"] += ok
+                if "latency" in event:
+                    endpoint["latencies"].append(event["latency"])
+
+    def roll(data: dict) -> dict:
+        latencies = data["latencies"]
+        result = {
+            "total": data["total"],
+            "success_rate": data["ok"] / data["total"] if data["total"] else 0.0,
+            "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+        }
+        if "errors" in data:
+            result["pending"] = data["pending"]
+            result["errors"] = dict(data["errors"])
+        return result
+
+    return {
+        "accounts": len(accounts),
+        "stages": {name: roll(data) for name, data in stages.items()},
+        "endpoints": {name: roll(data) for name, data in endpoints.items()},
+    }
+
+
+def print_summary(path: str):
+    summary = summarize(path)
+    print(f"\nRun {path}: {summary['accounts']} accounts\n")
+
+    for title, rows in (("Stage", summary["stages"]), ("Endpoint", summary["endpoints"])):
+        if not rows:
+            continue
+        print(f"{title:<32} {'total':>7} {'pending':>8} {'success':>8} {'avg s':>8} {'p50 s':>8} {'p95 s':>8}")
+        for name, row in sorted(rows.items()):
+            success = f"{row['success_rate']:.1%}" if row["total"] else "-"
+            print(
+                f"{name:<32} {row['total']:>7} {row.get('pending', 0):>8} {success:>8} "
+                f"{row['avg']:>8.2f} {row['p50']:>8.2f} {row['p95']:>8.2f}"
+            )
+            for error, count in row.get("errors", {}).items():
+                print(f"    {error}: {count}")
+        print()
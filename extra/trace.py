@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from extra import events
+from extra.events import EventLog
+
+
+class TraceLog(EventLog):
+    """
+    Writes spans in the Chrome trace-event JSON array format. The closing bracket is
+    optional for chrome://tracing and ui.perfetto.dev, so a killed run still loads.
+    """
+
+    def _writer(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("[\n")
+            first = True
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    break
+                file.write(("" if first else ",\n") + json.dumps(event, default=str))
+                first = False
+                if self._queue.empty():
+                    file.flush()
+            file.write("\n]\n")
+
+
+class Tracer:
+    """Every account is a process of the trace and every worker thread a track inside it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.origin = time.monotonic()
+        self._log = TraceLog(path)
+        self._named: set[int] = set()
+        self._lock = threading.Lock()
+
+    def complete(self, name: str, category: str, start: float, end: float, **args):
+        fields = events.context()
+        pid = fields.get("account", 0)
+        tid = threading.get_ident()
+
+        with self._lock:
+            if pid not in self._named:
+                self._named.add(pid)
+                self._log.emit(
+                    {
+                        "name": "process_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "args": {"name": f"account {pid}" if pid else "main"},
+                    }
+                )
+
+        if "address" in fields:
+            args.setdefault("address", fields["address"])
+        self._log.emit(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1_000_000),
+                "dur": round((end - start) * 1_000_000),
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    def close(self):
+        self._log.close()
+
+
+tracer: Tracer | None = None
+
+
+def configure(config: dict) -> str:
+    """Start a trace from the `trace` section of config.yaml, returns its path"""
+    global tracer
+    settings = config.get("trace", {})
+    if not settings.get("enabled", False):
+        return ""
+
+    directory = settings.get("dir", "logs")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    tracer = Tracer(path)
+    events.span_hook = record
+    logger.info(f"Writing span trace to {path}, open it in ui.perfetto.dev")
+    return path
+
+
+def close():
+    global tracer
+    if tracer:
+        events.span_hook = None
+        tracer.close()
+        tracer = None
+
+
+def record(name: str, category: str, start: float, end: float | None = None, **args):
+    """Span of a block that was already timed with time.monotonic()"""
+    if tracer:
+        tracer.complete(name, category, start, end or time.monotonic(), **args)
+
+
+@contextmanager
+def span(name: str, category: str, **args):
+    if tracer is None:
+        yield
+        return
+
+    start = time.monotonic()
+    try:
+        yield
+    except Exception as err:
+        args["error"] = type(err).__name__
+        raise
+    finally:
+        tracer.complete(name, category, start, time.monotonic(), **args)
+
+
+def sleep(seconds: float, reason: str = "sleep", stop: threading.Event | None = None):
+    """time.sleep that shows up on the trace as a wait, cut short when stop is set"""
+    with span(reason, "wait", seconds=seconds):
+        if stop is None:
+            time.sleep(seconds)
+        else:
+            stop.wait(seconds)
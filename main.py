@@ -1,19 +1,81 @@
 from loguru import logger
+import argparse
 import urllib3
 import sys
 
-from process import start
+from process import rerun_failed, run_audit, run_coordinator, run_daemon, run_worker, start
 
 
 def main():
+    args = parse_args()
+
+    if args.command == "summarize":
+        from extra.summary import print_summary
+
+        print_summary(args.log)
+        return
+
     configuration()
+
+    if args.command == "daemon":
+        run_daemon(args.threads, args.spread_hours)
+        return
+
+    if args.command == "rerun":
+        rerun_failed(args.threads)
+        return
+
+    if args.command == "coordinator":
+        run_coordinator(args.host, args.port)
+        return
+
+    if args.command == "worker":
+        run_worker(args.coordinator, args.threads, args.task)
+        return
+
+    if args.command == "audit":
+        run_audit(args.log, args.batch_size, not args.skip_api, args.threads)
+        return
+
     start()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="StarLabs Xterio")
+    commands = parser.add_subparsers(dest="command")
+
+    summarize = commands.add_parser("summarize", help="per-stage success rates and timings of a run")
+    summarize.add_argument("log", help="event log of the run, e.g. logs/run-20250101-120000.jsonl")
+
+    daemon = commands.add_parser("daemon", help="run daily Xterio tasks forever, each account when it is due")
+    daemon.add_argument("--threads", type=int, help="overrides daemon.threads from config.yaml")
+    daemon.add_argument("--spread-hours", type=float, help="overrides daemon.spread_hours from config.yaml")
+
+    rerun = commands.add_parser("rerun", help="replay only failed accounts from data/failures.jsonl")
+    rerun.add_argument("--threads", type=int, help="overrides daemon.threads from config.yaml")
+
+    coordinator = commands.add_parser("coordinator", help="serve data/private_keys.txt to workers on other hosts")
+    coordinator.add_argument("--host", help="overrides coordinator.host from config.yaml")
+    coordinator.add_argument("--port", type=int, help="overrides coordinator.port from config.yaml")
+
+    worker = commands.add_parser("worker", help="process accounts leased from a coordinator or a shared SQLite work table")
+    worker.add_argument("--coordinator", default="", help="http://127.0.0.1:port of a tunnelled coordinator, https://host:port or path of a SQLite work table, default coordinator.db")
+    worker.add_argument("--threads", type=int, help="overrides coordinator.threads from config.yaml")
+    worker.add_argument("--task", type=int, default=1, choices=(1, 2, 3, 4), help="menu option to run for every account")
+
+    audit = commands.add_parser("audit", help="check transactions of a run on chain and against api.xter.io")
+    audit.add_argument("log", help="event log of the run, e.g. logs/run-20250101-120000.jsonl")
+    audit.add_argument("--batch-size", type=int, default=200, help="receipts per JSON-RPC batch request")
+    audit.add_argument("--skip-api", action="store_true", help="only check receipts, don't sign in to compare user_task tx hashes")
+    audit.add_argument("--threads", type=int, default=10, help="accounts signed in at once for the API check")
+
+    return parser.parse_args()
+
+
 def configuration():
     urllib3.disable_warnings()
     logger.remove()
-    logger.add(sys.stdout, colorize=True, format="<light-cyan>{time:HH:mm:ss}</light-cyan> | <level> {level: <8}</level> | - <white>{message}</white>")
+    logger.add(sys.stdout, colorize=True, enqueue=True, format="<light-cyan>{time:HH:mm:ss}</light-cyan> | <level> {level: <8}</level> | - <white>{message}</white>")
 
 
 if __name__ == '__main__':
@@ -4,3 +4,17 @@ from . import utils
 from . import captcha_solver
 from . import binance
 from . import gpt
+from . import limiter
+from . import account
+from . import api
+from . import audit
+from . import bridge_tracker
+from . import cache
+from . import coordinator
+from . import retry
+from . import rpc
+from . import tasks
+from . import pipeline
+from . import prewarm
+from . import scheduler
+from . import signer
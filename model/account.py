@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class AccountRecord:
+    """
+    What is kept for every queued account. Clients are created by model.xterio.Xterio
+    only when the account is processed and released right after.
+    """
+
+    index: int
+    private_key: str
+    proxy: str = ""
+    address: str = ""
+    # xterio id_token of the last sign in
+    token: str = ""
+    # BSC bridge transaction of the last pipeline run, checked before bridging again
+    bridge_tx: str = ""
+    # pending / running / done / failed
+    state: str = "pending"
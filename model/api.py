@@ -0,0 +1,183 @@
+import json
+from dataclasses import dataclass, field
+from typing import Callable
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+API_URL = "https://api.xter.io"
+
+# err_code of a repeated invite code apply
+ERR_ALREADY_APPLIED = 10003
+
+
+class ApiError(Exception):
+    """Response of api.xter.io with a non-zero err_code"""
+
+    def __init__(self, err_code: int, message: str, path: str = ""):
+        super().__init__(f"{path} err_code {err_code}: {message}")
+        self.err_code = err_code
+        self.message = message
+        self.path = path
+
+
+class AlreadyAppliedError(ApiError):
+    pass
+
+
+class AuthError(ApiError):
+    """The id_token was rejected, usually because it expired"""
+
+
+# err_msg fragments of a rejected token, the API answers them with HTTP 200 too
+AUTH_MARKERS = ("unauthorized", "token expired", "invalid token", "not login", "login expired")
+
+
+ERRORS: dict[int, type[ApiError]] = {
+    ERR_ALREADY_APPLIED: AlreadyAppliedError,
+}
+
+
+@dataclass(slots=True)
+class UserTask:
+    updated_at: str
+    tx_hash: str = ""
+
+    @classmethod
+    def from_api(cls, data: dict) -> "UserTask":
+        return cls(data["UpdatedAt"], data.get("tx_hash") or "")
+
+
+@dataclass(slots=True)
+class Task:
+    id: int
+    user_task: list[UserTask] = field(default_factory=list)
+
+    @classmethod
+    def from_api(cls, data: dict) -> "Task":
+        return cls(data["ID"], [UserTask.from_api(item) for item in data["user_task"] or ()])
+
+
+@dataclass(slots=True)
+class Scene:
+    id: int | str
+    describe: str
+    prologue: str
+
+    @classmethod
+    def from_api(cls, data: dict) -> "Scene":
+        return cls(data.get("id", ""), data["describe"], data["prologue"])
+
+
+@dataclass(slots=True)
+class Login:
+    id_token: str
+    is_new: bool
+
+
+class XterioApi:
+    """
+    One method per api.xter.io endpoint. Every body is decoded once and err_code is
+    turned into ApiError, callers get typed models instead of raw dicts. Requests go
+    through `request(method, url, **kwargs)`, which is Xterio._request with its
+    retries, limiter and events. When a request is rejected for its token,
+    `reauthenticate()` is called to sign in again and the request is repeated once.
+    """
+
+    def __init__(self, request: Callable, reauthenticate: Callable | None = None):
+        self._request = request
+        self._reauthenticate = reauthenticate
+
+    def _send(self, method: str, path: str, authenticated: bool = True, **kwargs):
+        response = self._request(method, f"{API_URL}{path}", **kwargs)
+        if response.status_code == 401 and authenticated and self._reauthenticate:
+            self._reauthenticate()
+            response = self._request(method, f"{API_URL}{path}", **kwargs)
+        if response.status_code == 401:
+            raise AuthError(401, response.text[:300], path)
+        return response
+
+    def _decode(self, response, path: str):
+        body = loads(response.content)
+        err_code = body.get("err_code", 0)
+        if err_code != 0:
+            message = body.get("err_msg") or response.text[:300]
+            error = ERRORS.get(err_code)
+            if error is None:
+                error = AuthError if any(marker in message.lower() for marker in AUTH_MARKERS) else ApiError
+            raise error(err_code, message, path)
+        return body.get("data")
+
+    def _call(self, method: str, path: str, authenticated: bool = True, **kwargs):
+        response = self._send(method, path, authenticated, **kwargs)
+        try:
+            return self._decode(response, path)
+        except AuthError:
+            if not authenticated or self._reauthenticate is None:
+                raise
+            self._reauthenticate()
+            return self._decode(self._send(method, path, False, **kwargs), path)
+
+    def challenge(self, address: str) -> str:
+        return self._call(
+            "GET", f"/account/v1/login/wallet/{address.upper()}", authenticated=False
+        )["message"]
+
+    def login(self, address: str, signature: str) -> Login:
+        data = self._call(
+            "POST",
+            "/account/v1/login/wallet",
+            authenticated=False,
+            json={
+                "address": address,
+                "type": "eth",
+                "sign": signature,
+                "provider": "BYBIT",
+                "invite_code": "",
+            },
+        )
+        return Login(data["id_token"], int(data["is_new"]) == 1)
+
+    def tasks(self) -> list[Task]:
+        return [Task.from_api(item) for item in self._call("GET", "/ai/v1/task")["list"]]
+
+    def report_task(self, task_id: int):
+        self._call("POST", "/ai/v1/user/task/report", json={"task_id": task_id})
+
+    def submit_task(self, task_id: int, tx_hash: str):
+        self._call(
+            "POST",
+            "/ai/v1/user/task",
+            json={"task_id": task_id, "tx_hash": tx_hash, "is_by_bit": 1},
+        )
+
+    def chat_claim_status(self) -> int:
+        return self._call("GET", "/ai/v1/user/chat")["claim_status"]
+
+    def apply_invite_code(self, code: str):
+        self._call("POST", "/ai/v1/user/invite/apply", json={"code": code})
+
+    def invite_code(self) -> str:
+        return self._call("GET", "/ai/v1/user/invite/code")["code"]
+
+    def scene(self) -> Scene:
+        return Scene.from_api(self._call("GET", "/ai/v1/scene?lang=")["list"][0])
+
+    def chat(self, json_data: dict) -> dict | None:
+        """
+        The chat endpoint streams JSON lines instead of one body. Returns the answer
+        chunk of the last line, None when it can not be parsed.
+        """
+        response = self._send("POST", "/ai/v1/chat", json=json_data)
+        if "error" in response.text:
+            raise ApiError(-1, response.text[:300], "/ai/v1/chat")
+
+        try:
+            last_line = [line for line in response.text.splitlines() if line.strip()][-1]
+            return loads(last_line)["responses"][0]["chunk"]
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
@@ -0,0 +1,194 @@
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from loguru import logger
+
+from model.retry import default_policy
+
+# events of the event log that carry a transaction hash
+TX_STAGES = ("claim_mission", "claim_chat_score", "bridge")
+
+
+@dataclass(slots=True)
+class RecordedTx:
+    stage: str
+    chain: str
+    tx_hash: str
+    address: str
+    outcome: str
+    account: int = 0
+    task_id: int = 0
+
+
+@dataclass(slots=True)
+class Mismatch:
+    tx: RecordedTx
+    # missing_receipt / reverted / not_reported / unknown (receipt lookup kept failing)
+    problem: str
+    detail: str = ""
+
+
+def recorded_transactions(path: str) -> list[RecordedTx]:
+    """Every transaction of a run event log, the last event of a hash wins"""
+    transactions: dict[str, RecordedTx] = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("stage") not in TX_STAGES or not event.get("tx_hash"):
+                continue
+            tx_hash = event["tx_hash"].lower()
+            transactions[tx_hash] = RecordedTx(
+                event["stage"],
+                event.get("chain", "xterio"),
+                tx_hash,
+                event.get("address", ""),
+                event["outcome"],
+                event.get("account", 0),
+                event.get("task_id", 0),
+            )
+    return list(transactions.values())
+
+
+def fetch_receipts(
+    w3, hashes: list[str], batch_size: int = 200, workers: int = 8, attempts: int = 3
+) -> tuple[dict[str, dict | None], dict[str, str]]:
+    """
+    Receipts of all hashes with batched eth_getTransactionReceipt calls, several batches
+    in flight. Raw responses are used as is, a null result means the transaction is not
+    in the canonical chain of the node. Hashes whose lookup returned an error are asked
+    again, the ones still failing after `attempts` rounds are returned with their error
+    instead of a receipt.
+    """
+
+    def fetch(chunk: list[str]) -> tuple[dict[str, dict | None], dict[str, str]]:
+        try:
+            responses = w3.provider.make_batch_request(
+                [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk]
+            )
+        except Exception as err:
+            return {}, dict.fromkeys(chunk, str(err))
+        if isinstance(responses, dict):
+            return {}, dict.fromkeys(chunk, f"batch request failed: {responses.get('error')}")
+
+        found, failed = {}, {}
+        for tx_hash, response in zip(chunk, responses):
+            if "error" in response:
+                failed[tx_hash] = str(response["error"].get("message", response["error"]))
+            else:
+                found[tx_hash] = response.get("result")
+        return found, failed
+
+    receipts: dict[str, dict | None] = {}
+    errors: dict[str, str] = {}
+    remaining = hashes
+    for attempt in range(1, attempts + 1):
+        chunks = [remaining[start : start + batch_size] for start in range(0, len(remaining), batch_size)]
+        errors = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for found, failed in executor.map(fetch, chunks):
+                receipts.update(found)
+                errors.update(failed)
+        if not errors:
+            break
+        remaining = list(errors)
+        if attempt < attempts:
+            logger.warning(f"{len(remaining)} receipt lookups failed, retrying")
+            default_policy.sleep(attempt)
+    return receipts, errors
+
+
+def check_receipts(
+    transactions: list[RecordedTx], receipts: dict[str, dict | None], errors: dict[str, str] | None = None
+) -> list[Mismatch]:
+    errors = errors or {}
+    mismatches = []
+    for tx in transactions:
+        receipt = receipts.get(tx.tx_hash)
+        if tx.tx_hash in errors:
+            mismatches.append(Mismatch(tx, "unknown", errors[tx.tx_hash]))
+        elif receipt is None:
+            mismatches.append(Mismatch(tx, "missing_receipt", "dropped or reorged out"))
+        elif int(receipt["status"], 16) != 1:
+            mismatches.append(Mismatch(tx, "reverted", f"block {int(receipt['blockNumber'], 16)}"))
+    return mismatches
+
+
+def check_reported(transactions: list[RecordedTx], reported: dict[str, dict[int, set[str]]]) -> list[Mismatch]:
+    """
+    Compare claim transactions with user_task[].tx_hash of the API. `reported` maps an
+    address to the hashes api.xter.io has for each task id.
+    """
+    mismatches = []
+    for tx in transactions:
+        if tx.stage != "claim_mission" or tx.outcome != "ok" or tx.address not in reported:
+            continue
+        hashes = reported[tx.address].get(tx.task_id, set())
+        if tx.tx_hash not in hashes:
+            detail = f"task {tx.task_id}, api has {sorted(hashes) or 'no hash'}"
+            mismatches.append(Mismatch(tx, "not_reported", detail))
+    return mismatches
+
+
+def audit(
+    path: str,
+    web3_by_chain: dict,
+    load_reported=None,
+    batch_size: int = 200,
+) -> tuple[list[RecordedTx], list[Mismatch]]:
+    """
+    Check every transaction of a run on chain, and claims against the API when
+    load_reported(addresses) -> {address: {task_id: {tx_hash}}} is given.
+    """
+    transactions = recorded_transactions(path)
+    by_chain: dict[str, list[RecordedTx]] = defaultdict(list)
+    for tx in transactions:
+        by_chain[tx.chain].append(tx)
+
+    mismatches: list[Mismatch] = []
+    for chain, chain_transactions in by_chain.items():
+        if chain not in web3_by_chain:
+            logger.warning(f"No RPC for {chain}, skipped {len(chain_transactions)} transactions")
+            continue
+        logger.info(f"Fetching {len(chain_transactions)} receipts from {chain}")
+        receipts, errors = fetch_receipts(
+            web3_by_chain[chain], [tx.tx_hash for tx in chain_transactions], batch_size
+        )
+        mismatches.extend(check_receipts(chain_transactions, receipts, errors))
+
+    if load_reported:
+        addresses = sorted({tx.address for tx in transactions if tx.stage == "claim_mission" and tx.address})
+        logger.info(f"Fetching reported tasks of {len(addresses)} accounts from api.xter.io")
+        mismatches.extend(check_reported(transactions, load_reported(addresses)))
+
+    return transactions, mismatches
+
+
+def print_report(transactions: list[RecordedTx], mismatches: list[Mismatch], limit: int = 50):
+    totals: dict[tuple[str, str], int] = defaultdict(int)
+    for tx in transactions:
+        totals[(tx.chain, tx.stage)] += 1
+    problems: dict[tuple[str, str, str], int] = defaultdict(int)
+    for mismatch in mismatches:
+        problems[(mismatch.tx.chain, mismatch.tx.stage, mismatch.problem)] += 1
+
+    print(f"\nAudited {len(transactions)} transactions, {len(mismatches)} mismatches\n")
+    print(f"{'chain':<8} {'stage':<20} {'total':>7}")
+    for (chain, stage), total in sorted(totals.items()):
+        print(f"{chain:<8} {stage:<20} {total:>7}")
+        for (problem_chain, problem_stage, problem), count in sorted(problems.items()):
+            if (problem_chain, problem_stage) == (chain, stage):
+                print(f"    {problem}: {count}")
+
+    if mismatches:
+        print()
+        for mismatch in mismatches[:limit]:
+            tx = mismatch.tx
+            print(f"{mismatch.problem:<16} {tx.chain:<7} {tx.stage:<18} {tx.address} {tx.tx_hash} {mismatch.detail}")
+        if len(mismatches) > limit:
+            print(f"... and {len(mismatches) - limit} more")
+    print()
@@ -3,14 +3,17 @@ from binance.exceptions import BinanceAPIException
 from loguru import logger
 import time
 
+from model.limiter import BINANCE, limited
+
 
 def withdraw(api_key, api_secret, asset, amount, address, network=None):
     print(1)
     client = Client(api_key, api_secret)
 
     try:
-        # Optionally, fetch balance before attempting withdrawal
-        balance = client.get_asset_balance(asset=asset)
+        with limited(BINANCE):
+            # Optionally, fetch balance before attempting withdrawal
+            balance = client.get_asset_balance(asset=asset)
 
         if float(balance['free']) < amount:
             logger.error(f"Insufficient balance to withdraw {amount} {asset}")
@@ -19,12 +22,13 @@ def withdraw(api_key, api_secret, asset, amount, address, network=None):
         rounded_amount = round(amount, 8)
 
         # Perform the withdrawal
-        result = client.withdraw(
-            coin=asset,
-            address=address,
-            amount=rounded_amount,
-            network=network
-        )
+        with limited(BINANCE):
+            result = client.withdraw(
+                coin=asset,
+                address=address,
+                amount=rounded_amount,
+                network=network
+            )
 
         logger.info(f"Successfully initiated withdrawal from Binance: {result}")
         return True
@@ -0,0 +1,157 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from loguru import logger
+from web3 import Web3
+
+
+@dataclass
+class Deposit:
+    address: str
+    # Xterio balance in wei before the bridge transaction was sent
+    baseline: int
+    on_finished: Callable[[bool], None]
+    deadline: float
+    # BSC bridge transaction, checked until its receipt shows success
+    tx_hash: str = ""
+    source_confirmed: bool = False
+    # polls in a row that found neither the receipt nor the transaction
+    missing_polls: int = 0
+
+
+class DepositTracker:
+    """
+    Watches Xterio balances of every bridged address with one batched JSON-RPC request
+    per poll and calls on_finished(True) as soon as the deposit lands on L2, or
+    on_finished(False) when it did not arrive in time. With source_w3 the BSC bridge
+    transactions are checked in the same batched way, so a reverted or dropped bridge
+    fails right away instead of at the timeout.
+
+    Any balance can be watched this way, e.g. BSC balances for Binance withdrawals;
+    `label` names what is awaited in the log.
+    """
+
+    # polls without receipt and without the transaction itself before it counts as dropped
+    MAX_MISSING_POLLS = 3
+
+    def __init__(
+        self,
+        w3: Web3,
+        poll_interval: float = 10,
+        timeout: float = 1800,
+        batch_size: int = 100,
+        source_w3: Web3 | None = None,
+        label: str = "Bridge deposit",
+    ):
+        self.w3 = w3
+        self.source_w3 = source_w3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.label = label
+
+        self._deposits: dict[str, Deposit] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def track(self, address: str, baseline: int, on_finished: Callable[[bool], None], tx_hash: str = ""):
+        with self._lock:
+            self._deposits[address] = Deposit(
+                address, baseline, on_finished, time.monotonic() + self.timeout, tx_hash
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="deposit-tracker", daemon=True)
+                self._thread.start()
+
+    def pending(self) -> int:
+        return len(self._deposits)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as err:
+                logger.error(f"Deposit tracker poll failed: {err}")
+
+    def poll(self):
+        with self._lock:
+            deposits = list(self._deposits.values())
+
+        try:
+            if self.source_w3:
+                deposits = self._check_sources(deposits)
+
+            for start in range(0, len(deposits), self.batch_size):
+                chunk = deposits[start : start + self.batch_size]
+                with self.w3.batch_requests() as batch:
+                    for deposit in chunk:
+                        batch.add(self.w3.eth.get_balance(deposit.address))
+                    balances = batch.execute()
+
+                for deposit, balance in zip(chunk, balances):
+                    if isinstance(balance, int) and balance > deposit.baseline:
+                        logger.success(f"{deposit.address} | {self.label} arrived")
+                        self._finish(deposit, True)
+        finally:
+            # also when a batch failed, an RPC that stays down must not keep deposits forever
+            self._expire()
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [deposit for deposit in self._deposits.values() if now > deposit.deadline]
+        for deposit in expired:
+            logger.error(f"{deposit.address} | {self.label} did not arrive in {self.timeout}s")
+            self._finish(deposit, False)
+
+    def _check_sources(self, deposits: list[Deposit]) -> list[Deposit]:
+        """Fail deposits whose bridge transaction reverted or was dropped, returns the rest"""
+        unconfirmed = [deposit for deposit in deposits if deposit.tx_hash and not deposit.source_confirmed]
+
+        for start in range(0, len(unconfirmed), self.batch_size):
+            chunk = unconfirmed[start : start + self.batch_size]
+            requests = []
+            for deposit in chunk:
+                requests.append(("eth_getTransactionReceipt", [deposit.tx_hash]))
+                requests.append(("eth_getTransactionByHash", [deposit.tx_hash]))
+            try:
+                responses = self.source_w3.provider.make_batch_request(requests)
+            except Exception as err:
+                logger.error(f"Deposit tracker receipt batch failed: {err}")
+                return deposits
+            if isinstance(responses, dict):
+                logger.error(f"Deposit tracker receipt batch failed: {responses.get('error')}")
+                return deposits
+
+            for index, deposit in enumerate(chunk):
+                receipt_response, tx_response = responses[2 * index], responses[2 * index + 1]
+                if "error" in receipt_response or "error" in tx_response:
+                    continue
+
+                receipt = receipt_response.get("result")
+                if receipt is not None:
+                    if int(receipt["status"], 16) == 1:
+                        deposit.source_confirmed = True
+                    else:
+                        logger.error(f"{deposit.address} | Bridge transaction reverted: {deposit.tx_hash}")
+                        self._finish(deposit, False)
+                elif tx_response.get("result") is None:
+                    deposit.missing_polls += 1
+                    if deposit.missing_polls >= self.MAX_MISSING_POLLS:
+                        logger.error(f"{deposit.address} | Bridge transaction dropped: {deposit.tx_hash}")
+                        self._finish(deposit, False)
+                else:
+                    deposit.missing_polls = 0
+
+        with self._lock:
+            return [deposit for deposit in deposits if deposit.address in self._deposits]
+
+    def _finish(self, deposit: Deposit, ok: bool):
+        with self._lock:
+            if self._deposits.get(deposit.address) is not deposit:
+                return
+            del self._deposits[deposit.address]
+        deposit.on_finished(ok)
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class LRUCache:
+    """Thread safe in-memory cache with a size bound and per entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.time():
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        with self._lock:
+            self._items[key] = (value, time.time() + (ttl or self.ttl))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class KeyLocks:
+    """
+    One lock per key for single-flight loads. A key's lock is dropped as soon as no
+    thread holds or waits for it, so locks don't pile up for every key ever loaded.
+    """
+
+    def __init__(self):
+        # key -> [lock, threads holding or waiting for it]
+        self._locks: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: str):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+class DiskStore:
+    """JSON values in a SQLite file, shared between runs. Expired rows are ignored and purged"""
+
+    def __init__(self, path: str, ttl: float = 86400):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+        )
+        self._db.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        self._db.commit()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value, ttl: float | None = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + (ttl or self.ttl)),
+            )
+            self._db.commit()
+
+
+class SharedCache:
+    """
+    Process-wide cache for data that is the same for every account. Concurrent
+    misses of one key are collapsed into a single load, the other threads wait for it.
+    """
+
+    def __init__(self, ttl: float = 600, disk_path: str = ""):
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries=256, ttl=ttl)
+        self.disk = DiskStore(disk_path, ttl) if disk_path else None
+
+        self._key_locks = KeyLocks()
+
+    def get_or_load(self, key: str, loader, ttl: float | None = None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        with self._key_locks.hold(key):
+            value = self.memory.get(key)
+            if value is not None:
+                return value
+
+            if self.disk:
+                value = self.disk.get(key)
+
+            if value is None:
+                value = loader()
+                if self.disk:
+                    self.disk.set(key, value, ttl)
+
+            self.memory.set(key, value, ttl)
+            return value
+
+    def invalidate(self, key: str):
+        self.memory.delete(key)
+
+
+shared_cache = SharedCache()
+
+
+def configure(config: dict):
+    """Recreate the shared cache from the `shared_cache` section of config.yaml"""
+    global shared_cache
+    settings = config.get("shared_cache", {})
+    shared_cache = SharedCache(
+        ttl=settings.get("ttl", 600),
+        disk_path=settings.get("disk_path", ""),
+    )
@@ -0,0 +1,270 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+
+from model.account import AccountRecord
+
+# pending -> leased -> done / failed. Leases that are not renewed go back to pending
+STATES = ("pending", "leased", "done", "failed")
+
+
+def account_id(private_key: str) -> str:
+    return hashlib.sha256(private_key.encode()).hexdigest()[:16]
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class WorkTable:
+    """
+    Accounts of a run in a SQLite file. Workers lease batches, renew the leases with
+    heartbeats and report results; a lease that expires (crashed or killed worker)
+    puts its accounts back to pending. Every write runs in BEGIN IMMEDIATE, so several
+    processes can share one file.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            "id TEXT PRIMARY KEY, idx INTEGER, private_key TEXT, proxy TEXT, "
+            "state TEXT, worker TEXT, lease_expires REAL, attempts INTEGER, "
+            "address TEXT, result TEXT, updated REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS work_state ON work (state, lease_expires)")
+
+    def _write(self, func, *args):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(*args)
+                self._db.execute("COMMIT")
+                return result
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def seed(self, accounts: list[AccountRecord]) -> int:
+        """Add accounts that are not in the table yet, returns how many were added"""
+
+        def seed():
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO work VALUES (?, ?, ?, ?, 'pending', '', 0, 0, '', '', ?)",
+                [
+                    (account_id(account.private_key), account.index, account.private_key, account.proxy, time.time())
+                    for account in accounts
+                ],
+            )
+            return self._db.total_changes - before
+
+        return self._write(seed)
+
+    def lease(self, worker: str, count: int) -> list[AccountRecord]:
+        def lease():
+            now = time.time()
+            self._db.execute(
+                "UPDATE work SET state = 'pending', worker = '' WHERE state = 'leased' AND lease_expires < ?",
+                (now,),
+            )
+            rows = self._db.execute(
+                "SELECT id, idx, private_key, proxy FROM work WHERE state = 'pending' "
+                "ORDER BY attempts, idx LIMIT ?",
+                (count,),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE work SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                [(worker, now + self.lease_seconds, now, row[0]) for row in rows],
+            )
+            return [AccountRecord(index, private_key, proxy) for _, index, private_key, proxy in rows]
+
+        return self._write(lease)
+
+    def heartbeat(self, worker: str, ids: list[str]) -> int:
+        """Extend leases of the worker, returns how many it still holds"""
+
+        def heartbeat():
+            before = self._db.total_changes
+            self._db.executemany(
+                "UPDATE work SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                [(time.time() + self.lease_seconds, item, worker) for item in ids],
+            )
+            return self._db.total_changes - before
+
+        return self._write(heartbeat)
+
+    def complete(self, worker: str, item: str, ok: bool | None, address: str = "", result: str = "") -> bool:
+        """
+        Record the result of a leased account, ok=None gives it back unprocessed. False
+        when the lease was lost, the account was then handed to another worker.
+        """
+        state = "pending" if ok is None else "done" if ok else "failed"
+
+        def complete():
+            before = self._db.total_changes
+            self._db.execute(
+                "UPDATE work SET state = ?, worker = '', address = ?, result = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND state = 'leased'",
+                (state, address, result, time.time(), item, worker),
+            )
+            return self._db.total_changes > before
+
+        return self._write(complete)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM work GROUP BY state").fetchall()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(dict(rows))
+        return counts
+
+
+class CoordinatorServer:
+    """
+    Serves a WorkTable over HTTP for workers on other hosts. JSON in and out, every
+    request has to carry the shared token in the X-Coordinator-Token header. Leases
+    hand out private keys and the server speaks plain HTTP, so it only listens on
+    loopback; other hosts reach it through an SSH tunnel or a TLS proxy.
+    """
+
+    def __init__(self, table: WorkTable, host: str = "127.0.0.1", port: int = 8765, token: str = ""):
+        if not token and not is_loopback(host):
+            raise ValueError(f"coordinator token is required to listen on {host}, set coordinator.token")
+        if not is_loopback(host):
+            raise ValueError(
+                f"coordinator serves plain HTTP and must not listen on {host}, "
+                "keep it on 127.0.0.1 and reach it through an SSH tunnel or a TLS proxy"
+            )
+        self.table = table
+        self.token = token
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.address = self.httpd.server_address
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self) -> bool:
+                sent = self.headers.get("X-Coordinator-Token", "")
+                if server.token and not hmac.compare_digest(sent.encode(), server.token.encode()):
+                    self._reply(403, {"error": "bad token"})
+                    return False
+                return True
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path == "/stats":
+                    self._reply(200, server.table.stats())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                table = server.table
+
+                if self.path == "/lease":
+                    accounts = table.lease(payload["worker"], payload["count"])
+                    self._reply(
+                        200,
+                        [
+                            {"index": account.index, "private_key": account.private_key, "proxy": account.proxy}
+                            for account in accounts
+                        ],
+                    )
+                elif self.path == "/heartbeat":
+                    self._reply(200, {"held": table.heartbeat(payload["worker"], payload["ids"])})
+                elif self.path == "/complete":
+                    ok = table.complete(
+                        payload["worker"],
+                        payload["id"],
+                        payload["ok"],
+                        payload.get("address", ""),
+                        payload.get("result", ""),
+                    )
+                    self._reply(200, {"recorded": ok})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                logger.debug(f"Coordinator | {self.address_string()} {format % args}")
+
+        return Handler
+
+    def serve_forever(self):
+        logger.info(f"Coordinator listening on {self.address[0]}:{self.address[1]}")
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.httpd.serve_forever, name="coordinator", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RemoteWorkTable:
+    """Same interface as WorkTable, backed by a CoordinatorServer"""
+
+    def __init__(self, url: str, token: str = "", timeout: float = 30):
+        parsed = urlparse(url)
+        if parsed.scheme != "https" and not is_loopback(parsed.hostname or ""):
+            raise ValueError(f"leases carry private keys, use https or a tunnel to 127.0.0.1 instead of {url}")
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        if token:
+            self._session.headers["X-Coordinator-Token"] = token
+
+    def _post(self, path: str, payload: dict):
+        response = self._session.post(f"{self.url}{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, worker: str, count: int) -> list[AccountRecord]:
+        rows = self._post("/lease", {"worker": worker, "count": count})
+        return [AccountRecord(row["index"], row["private_key"], row["proxy"]) for row in rows]
+
+    def heartbeat(self, worker: str, ids: list[str]) -> int:
+        return self._post("/heartbeat", {"worker": worker, "ids": ids})["held"]
+
+    def complete(self, worker: str, item: str, ok: bool | None, address: str = "", result: str = "") -> bool:
+        payload = {"worker": worker, "id": item, "ok": ok, "address": address, "result": result}
+        return self._post("/complete", payload)["recorded"]
+
+    def stats(self) -> dict[str, int]:
+        response = self._session.get(f"{self.url}/stats", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
@@ -1,6 +1,15 @@
+import hashlib
+import random
+import threading
+
+from loguru import logger
 from openai import OpenAI
 from typing import Optional
 
+from extra import recorder
+from model.cache import DiskStore, KeyLocks, LRUCache
+from model.limiter import OPENAI, limited
+
 
 def ask_chatgpt(
     api_key: str, messages: list[dict]
@@ -16,15 +25,128 @@ def ask_chatgpt(
     Returns:
         str: ChatGPT's response
     """
-    client = OpenAI(api_key=api_key)
-
-    try:
-        # Make the API call
+    def complete() -> str:
+        client = OpenAI(api_key=api_key)
         response = client.chat.completions.create(
             model="gpt-4o-mini", messages=messages
         )
-
         # Extract and return the response text
         return response.choices[0].message.content
+
+    try:
+        # Make the API call, played back from fixtures during replay
+        with limited(OPENAI):
+            return recorder.stubbed(recorder.OPENAI_KEY, complete)
     except Exception as e:
         return f"Error occurred: {str(e)}"
+
+
+class ChatAnswerCache:
+    """
+    Pools of ChatGPT answers keyed by scene and conversation prefix. Until a pool holds
+    `answers_per_key` answers every request goes to OpenAI and is added to the pool,
+    after that answers are taken from the pool at random. Requests of one key go one
+    at a time, so concurrent misses don't all hit OpenAI or overwrite each other's answers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 86400,
+        answers_per_key: int = 5,
+        prefix_chars: int = 200,
+        disk_path: str = "",
+    ):
+        self.answers_per_key = answers_per_key
+        self.prefix_chars = prefix_chars
+        self.memory = LRUCache(max_entries, ttl)
+        self.disk = DiskStore(disk_path, ttl) if disk_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self._key_locks = KeyLocks()
+        self._lock = threading.Lock()
+
+    def key(self, scene_key: str, messages: list[dict]) -> str:
+        """Scene, turn number and the start of the last assistant message"""
+        turn = sum(1 for message in messages if message["role"] == "user")
+        last = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "assistant"), ""
+        )
+        last = " ".join(last.lower().split())[: self.prefix_chars]
+        raw = f"{scene_key}|{turn}|{last}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _load(self, key: str) -> list[str]:
+        answers = self.memory.get(key)
+        if answers is None and self.disk:
+            answers = self.disk.get(key)
+            if answers is not None:
+                self.memory.set(key, answers)
+        return answers or []
+
+    def ask(self, api_key: str, messages: list[dict], scene_key: str) -> str:
+        key = self.key(scene_key, messages)
+        answers = self._load(key)
+        if len(answers) >= self.answers_per_key:
+            with self._lock:
+                self.hits += 1
+            return random.choice(answers)
+
+        with self._key_locks.hold(key):
+            # the pool may have been filled while waiting for the lock
+            answers = self._load(key)
+            if len(answers) >= self.answers_per_key:
+                with self._lock:
+                    self.hits += 1
+                return random.choice(answers)
+
+            with self._lock:
+                self.misses += 1
+
+            answer = ask_chatgpt(api_key, messages)
+            if answer.startswith("Error occurred"):
+                return answer
+
+            answers = answers + [answer]
+            self.memory.set(key, answers)
+            if self.disk:
+                self.disk.set(key, answers)
+        return answer
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def log_stats(self):
+        if self.hits or self.misses:
+            logger.info(
+                f"ChatGPT answer cache: {self.hits} hits, {self.misses} misses, "
+                f"hit rate {self.hit_rate():.0%}"
+            )
+
+
+answer_cache: ChatAnswerCache | None = None
+
+
+def configure(config: dict):
+    """Create the answer cache from the `chat_gpt_cache` section of config.yaml"""
+    global answer_cache
+    settings = config["settings"].get("chat_gpt_cache", {})
+    if not settings.get("enabled", False):
+        answer_cache = None
+        return
+
+    answer_cache = ChatAnswerCache(
+        max_entries=settings.get("max_entries", 1024),
+        ttl=settings.get("ttl", 86400),
+        answers_per_key=settings.get("answers_per_key", 5),
+        prefix_chars=settings.get("prefix_chars", 200),
+        disk_path=settings.get("disk_path", ""),
+    )
+
+
+def ask_chatgpt_cached(api_key: str, messages: list[dict], scene_key: str) -> str:
+    if answer_cache is None:
+        return ask_chatgpt(api_key, messages)
+    return answer_cache.ask(api_key, messages, scene_key)
@@ -0,0 +1,152 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from model.retry import is_endpoint_failure
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit of one dependency. Every healthy response raises the limit
+    by 1/limit (about +1 per round of requests), a 429/timeout halves it, and latency
+    far above the best seen latency shrinks it slightly before errors start.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        latency_tolerance: float = 3.0,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+
+        self.in_flight = 0
+        self.best_latency: float | None = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float | None, overloaded: bool):
+        """Free a slot, latency None leaves the latency baseline out of it"""
+        with self._condition:
+            self.in_flight -= 1
+
+            if overloaded:
+                self._decrease(0.5, "overloaded")
+            elif (
+                latency is not None
+                and self.best_latency is not None
+                and latency > self.best_latency * self.latency_tolerance
+            ):
+                self._decrease(0.9, f"latency {latency:.2f}s")
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            if latency is not None and not overloaded:
+                # best latency slowly forgets old values so a permanent slowdown becomes the new normal
+                if self.best_latency is None or latency < self.best_latency:
+                    self.best_latency = latency
+                else:
+                    self.best_latency = self.best_latency * 0.99 + latency * 0.01
+
+            self._condition.notify_all()
+
+    def _decrease(self, factor: float, reason: str):
+        # one decrease per second, a burst of failures from the same wave counts once
+        now = time.monotonic()
+        if now - self._last_decrease < 1:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, self.limit * factor)
+        if int(new_limit) < int(self.limit):
+            logger.debug(f"{self.name} | Concurrency limit {int(self.limit)} -> {int(new_limit)}: {reason}")
+        self.limit = new_limit
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+_settings: dict = {}
+
+# dependencies every account step goes through
+XTERIO_API = "xterio_api"
+OPENAI = "openai"
+BINANCE = "binance"
+CAPTCHA = "captcha"
+
+
+def rpc_dependency(chain: str) -> str:
+    return f"rpc_{chain}"
+
+
+def endpoint_limiter(dependency: str, endpoint: str) -> str:
+    """
+    Limiter name of one endpoint (API path, RPC method) of a dependency. Endpoints get
+    their own latency baseline, so a slow streaming call does not shrink the limit of
+    fast ones. Settings of the dependency apply to each of its endpoints and to the
+    limiter of the dependency itself, which caps all its endpoints together.
+    """
+    return f"{dependency}:{endpoint}"
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            dependency = name.partition(":")[0]
+            settings = _settings.get(name) or _settings.get(dependency) or _settings.get("default", {})
+            limiter = AdaptiveLimiter(
+                name,
+                initial=settings.get("initial", 10),
+                min_limit=settings.get("min", 1),
+                max_limit=settings.get("max", 200),
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+def configure(config: dict):
+    """Limits of dependencies from the `concurrency` section of config.yaml"""
+    _settings.clear()
+    _settings.update(config.get("concurrency", {}))
+    with _limiters_lock:
+        _limiters.clear()
+
+
+@contextmanager
+def limited(name: str):
+    """
+    Wait for a free slot of the dependency and report how the call went. An endpoint
+    also takes a slot of its dependency, so endpoints of one host do not add up to more
+    than the host's limit. That shared limit reacts to overload only, latency differs
+    too much between endpoints.
+    """
+    limiter = get_limiter(name)
+    dependency, _, endpoint = name.partition(":")
+    shared = get_limiter(dependency) if endpoint else None
+    limiter.acquire()
+    if shared:
+        shared.acquire()
+    start = time.monotonic()
+    overloaded = False
+    try:
+        yield
+    except Exception as err:
+        overloaded = is_endpoint_failure(err)
+        raise
+    finally:
+        if shared:
+            shared.release(None, overloaded)
+        limiter.release(time.monotonic() - start, overloaded)
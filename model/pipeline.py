@@ -0,0 +1,166 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from loguru import logger
+
+from extra import events
+from model.account import AccountRecord
+
+
+@dataclass
+class PipelineItem:
+    account: AccountRecord
+    # one Xterio instance per account, so every stage shares its sign in and clients
+    xterio: object
+    failed_stage: str = ""
+    error: Exception | None = None
+    # name of the stage to start from, e.g. when replaying a failed account
+    resume_from: str = ""
+    # set when the run was stopped before the account got through failed_stage
+    interrupted: bool = False
+
+
+# returned by a stage handler that hands the account over to a background job,
+# which calls Pipeline.resume when it is done
+DEFERRED = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    # handler(item) -> True to pass the account to the next stage, or DEFERRED
+    handler: Callable[[PipelineItem], bool]
+    threads: int
+
+
+class Pipeline:
+    """
+    Accounts flow through stages connected by queues. Every stage has its own pool
+    of worker threads, so an account enters the next stage as soon as it is done
+    with the previous one, independently of the rest of the accounts.
+
+    Once `stop` is set no stage is started any more: queued and deferred accounts
+    finish as interrupted at the stage they were waiting for, running ones finish
+    their current step first.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        on_finished: Callable[[PipelineItem, bool], None],
+        stop: threading.Event | None = None,
+    ):
+        self.stages = stages
+        self.on_finished = on_finished
+        self.queues = [queue.Queue() for _ in stages]
+        self.stop = stop
+
+        self._remaining = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        # id(item) -> (item, stage index) of accounts handed over to a background job
+        self._deferred: dict[int, tuple[PipelineItem, int]] = {}
+        # results of background jobs that finished before their handler returned
+        self._resumed_early: dict[int, bool] = {}
+
+    def run(self, items: list[PipelineItem]):
+        if not items:
+            return
+
+        self._remaining = len(items)
+        for item in items:
+            self.queues[self._stage_index(item.resume_from) if item.resume_from else 0].put(item)
+
+        workers = [
+            threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{number}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for number in range(stage.threads)
+        ]
+        for worker in workers:
+            worker.start()
+
+        while not self._done.wait(0.5):
+            if self.stop is not None and self.stop.is_set():
+                self._interrupt_deferred()
+        for worker in workers:
+            worker.join()
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        while not self._done.is_set():
+            try:
+                item = self.queues[index].get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if self.stop is not None and self.stop.is_set():
+                self._interrupt(index, item)
+                continue
+
+            events.bind(account=item.account.index, address=item.account.address)
+            try:
+                # prefixed, "bridge" alone is the event of the bridge transaction
+                with events.timed(f"stage:{stage.name}") as event:
+                    ok = stage.handler(item)
+                    event.outcome = "deferred" if ok is DEFERRED else "ok" if ok else "failed"
+            except Exception as err:
+                logger.error(f"{item.account.index} | Stage {stage.name} failed: {err}")
+                item.error = err
+                ok = False
+
+            if ok is DEFERRED:
+                with self._lock:
+                    ok = self._resumed_early.pop(id(item), DEFERRED)
+                    if ok is DEFERRED:
+                        self._deferred[id(item)] = (item, index)
+            if ok is not DEFERRED:
+                self._advance(index, item, ok)
+
+    def resume(self, item: PipelineItem, stage_name: str, ok: bool):
+        """Finish a stage that returned DEFERRED, ignored when the run was stopped meanwhile"""
+        with self._lock:
+            if self._deferred.pop(id(item), None) is None:
+                if not item.interrupted:
+                    self._resumed_early[id(item)] = ok
+                return
+        self._advance(self._stage_index(stage_name), item, ok)
+
+    def _interrupt(self, index: int, item: PipelineItem):
+        item.interrupted = True
+        item.failed_stage = self.stages[index].name
+        self._finish(item, False)
+
+    def _interrupt_deferred(self):
+        with self._lock:
+            deferred = list(self._deferred.values())
+            self._deferred.clear()
+            for item, _ in deferred:
+                item.interrupted = True
+        for item, index in deferred:
+            self._interrupt(index, item)
+
+    def _stage_index(self, stage_name: str) -> int:
+        return next(i for i, stage in enumerate(self.stages) if stage.name == stage_name)
+
+    def _advance(self, index: int, item: PipelineItem, ok: bool):
+        if not ok:
+            item.failed_stage = self.stages[index].name
+            self._finish(item, False)
+        elif index + 1 < len(self.stages):
+            self.queues[index + 1].put(item)
+        else:
+            self._finish(item, True)
+
+    def _finish(self, item: PipelineItem, ok: bool):
+        try:
+            self.on_finished(item, ok)
+        except Exception as err:
+            # a worker or the deposit tracker must survive a failing callback
+            logger.opt(exception=err).error(f"{item.account.index} | Finishing the account failed: {err}")
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                if self._remaining == 0:
+                    self._done.set()
@@ -0,0 +1,74 @@
+import threading
+from collections import deque
+
+from model.account import AccountRecord
+from model.xterio import Xterio
+
+
+class Prewarmer:
+    """
+    Uses idle time of workers (startup stagger, pause between accounts) to build the
+    Xterio instance of the next queued account and open its connections, so DNS, TCP
+    and TLS setup is done before the account starts.
+
+    curl_cffi keeps a curl handle, and so its connections, per thread. The account a
+    worker warms is therefore reserved for that worker and run by it next; a worker
+    without a reservation takes the next queued account, or one reserved by a worker
+    that got no further job.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self._upcoming: deque[AccountRecord] = deque()
+        # thread ident -> (account, instance, warm-up finished) of the reserved account
+        self._reserved: dict[int, tuple[AccountRecord, Xterio, threading.Event]] = {}
+        self._lock = threading.Lock()
+
+    def queue(self, account: AccountRecord):
+        with self._lock:
+            self._upcoming.append(account)
+
+    def warm_next(self):
+        """Reserve and warm the next queued account for the calling worker"""
+        worker = threading.get_ident()
+        with self._lock:
+            if worker in self._reserved or not self._upcoming:
+                return
+            account = self._upcoming.popleft()
+            instance = Xterio.from_record(account, self.config)
+            done = threading.Event()
+            self._reserved[worker] = (account, instance, done)
+
+        try:
+            instance.prewarm()
+        finally:
+            done.set()
+
+    def take(self) -> tuple[AccountRecord, Xterio, bool]:
+        """
+        Account for the calling worker to run now, its instance and whether that was
+        warmed on this thread. Called once per queued account.
+        """
+        with self._lock:
+            reserved = self._reserved.pop(threading.get_ident(), None)
+            if reserved is not None:
+                account, instance, _ = reserved
+                return account, instance, True
+            if self._upcoming:
+                account = self._upcoming.popleft()
+                return account, Xterio.from_record(account, self.config), False
+            # every queued account is reserved, take one whose worker has no job left
+            _, (account, instance, done) = self._reserved.popitem()
+
+        # the client must not be used by the account while another thread warms it
+        done.wait()
+        return account, instance, False
+
+    def close(self):
+        with self._lock:
+            leftovers = list(self._reserved.values())
+            self._reserved.clear()
+            self._upcoming.clear()
+        for _, instance, done in leftovers:
+            done.wait()
+            instance.release()
@@ -0,0 +1,284 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+# error fragments that point to a struggling endpoint rather than a bad request
+ENDPOINT_FAILURE_MARKERS = (
+    "timeout",
+    "timed out",
+    "connection",
+    "failed to connect",
+    "could not resolve",
+    "recv failure",
+    "too many requests",
+    "rate limit",
+    "429",
+    "502",
+    "503",
+    "504",
+    "temporarily unavailable",
+    "header not found",
+)
+
+# error fragments of the account's proxy failing. Breakers are shared by all accounts,
+# so these must not count against the endpoint behind the proxy
+PROXY_FAILURE_MARKERS = (
+    "proxy",
+    "connect tunnel",
+)
+
+# error fragments that will never succeed on a retry
+FATAL_MARKERS = (
+    "insufficient funds",
+    "execution reverted",
+    "nonce too low",
+    "invalid sender",
+    "invalid mnemonic",
+    "non-hexadecimal",
+)
+
+# error fragments that show a request never reached the server, so even a request that
+# must not run twice (chat message, task report) can be sent again
+NOT_SENT_MARKERS = (
+    "failed to connect",
+    "could not connect",
+    "couldn't connect",
+    "could not resolve",
+    "connection refused",
+    "connect tunnel",
+)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class RetryableStatusError(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}: {response.text[:200]}")
+        self.response = response
+
+
+def endpoint_name(url: str) -> str:
+    """Host part of the url, used as circuit breaker key"""
+    return urlparse(url).netloc or url
+
+
+def raise_for_retryable_status(response):
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableStatusError(response)
+    return response
+
+
+def is_proxy_failure(err: BaseException) -> bool:
+    if any(cls.__name__ == "ProxyError" for cls in type(err).__mro__):
+        return True
+    text = str(err).lower()
+    return any(marker in text for marker in PROXY_FAILURE_MARKERS)
+
+
+def is_endpoint_failure(err: BaseException) -> bool:
+    if is_proxy_failure(err):
+        return False
+
+    if isinstance(err, (TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+
+    text = str(err).lower()
+    return any(marker in text for marker in ENDPOINT_FAILURE_MARKERS)
+
+
+def is_retryable(err: BaseException) -> bool:
+    if isinstance(err, CircuitOpenError) or is_endpoint_failure(err):
+        return True
+
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    if status is not None and 400 <= status < 500:
+        return False
+
+    text = str(err).lower()
+    return not any(marker in text for marker in FATAL_MARKERS)
+
+
+def is_not_sent(err: BaseException) -> bool:
+    """Whether the server surely did not process the request, unlike after a read timeout"""
+    if isinstance(err, CircuitOpenError):
+        return True
+
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    if status is not None:
+        return status in (429, 503)
+
+    text = str(err).lower()
+    return any(marker in text for marker in NOT_SENT_MARKERS)
+
+
+class CircuitBreaker:
+    """
+    Shared per endpoint. After `failure_threshold` consecutive failures the endpoint
+    is paused for `reset_timeout` seconds for every worker, then a single probe request
+    decides whether it is closed again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def wait(self, max_wait: float):
+        """Block until the breaker lets a request through, or raise CircuitOpenError"""
+        deadline = time.monotonic() + max_wait
+        while not self.allow():
+            if time.monotonic() >= deadline:
+                raise CircuitOpenError(f"{self.name} is paused after repeated failures")
+            time.sleep(min(1.0, self.remaining()) or 0.1)
+
+    def remaining(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def trip(self):
+        """Open the breaker right away, e.g. when a health check fails"""
+        with self._lock:
+            self.failures = max(self.failures, self.failure_threshold)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"{self.name} | Circuit opened for {self.reset_timeout}s after {self.failures} failures"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, attempt starts from 1"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def sleep(self, attempt: int):
+        time.sleep(self.delay(attempt))
+
+    def call(
+        self,
+        func,
+        *args,
+        endpoint: str | None = None,
+        attempts: int | None = None,
+        log_indicator: str | int = "-",
+        idempotent: bool = True,
+        **kwargs,
+    ):
+        """
+        Call func until it succeeds. Exceptions are classified with is_retryable,
+        the last exception is raised when all attempts are used. A call that is not
+        idempotent is only repeated when is_not_sent shows it never arrived.
+        """
+        attempts = attempts or self.attempts
+        breaker = get_breaker(endpoint) if endpoint else None
+
+        for attempt in range(1, attempts + 1):
+            try:
+                if breaker:
+                    breaker.wait(self.max_delay * attempts)
+                result = func(*args, **kwargs)
+            except Exception as err:
+                if breaker and is_endpoint_failure(err):
+                    breaker.record_failure()
+                elif breaker and not isinstance(err, CircuitOpenError):
+                    breaker.record_success()
+                retryable = is_retryable(err) if idempotent else is_not_sent(err)
+                if not retryable or attempt == attempts:
+                    raise
+                logger.warning(f"{log_indicator} | Attempt {attempt} failed: {err}, retrying...")
+                self.sleep(attempt)
+                continue
+
+            if breaker:
+                breaker.record_success()
+            return result
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_breaker_settings = {"failure_threshold": 5, "reset_timeout": 30}
+
+default_policy = RetryPolicy()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, **_breaker_settings)
+            _breakers[endpoint] = breaker
+        return breaker
+
+
+def configure(config: dict):
+    """Apply the `retry` section of config.yaml to the shared policy and breakers"""
+    settings = config.get("retry", {})
+
+    default_policy.attempts = settings.get("attempts", default_policy.attempts)
+    default_policy.base_delay = settings.get("base_delay", default_policy.base_delay)
+    default_policy.max_delay = settings.get("max_delay", default_policy.max_delay)
+    default_policy.jitter = settings.get("jitter", default_policy.jitter)
+
+    _breaker_settings["failure_threshold"] = settings.get(
+        "breaker_failure_threshold", _breaker_settings["failure_threshold"]
+    )
+    _breaker_settings["reset_timeout"] = settings.get(
+        "breaker_reset_timeout", _breaker_settings["reset_timeout"]
+    )
@@ -0,0 +1,329 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from eth_utils import keccak
+from hexbytes import HexBytes
+from loguru import logger
+from web3 import Web3
+from web3._utils.batching import sort_batch_response_by_response_ids
+from web3.middleware import ExtraDataToPOAMiddleware
+from web3.providers import JSONBaseProvider
+
+from extra import events, recorder, trace
+from model.limiter import endpoint_limiter, limited, rpc_dependency
+from model.retry import (
+    CircuitBreaker,
+    default_policy,
+    endpoint_name,
+    get_breaker,
+    is_endpoint_failure,
+)
+
+
+# node answers when the transaction already reached it from another endpoint
+ALREADY_KNOWN_MARKERS = ("already known", "known transaction", "already imported", "alreadyknown")
+
+REQUEST_TIMEOUT = 30
+
+
+class RpcEndpointError(Exception):
+    pass
+
+
+def is_already_known(response: dict) -> bool:
+    message = (response.get("error") or {}).get("message", "").lower()
+    return any(marker in message for marker in ALREADY_KNOWN_MARKERS)
+
+
+class RpcEndpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.name = endpoint_name(url)
+        self.breaker = get_breaker(self.name)
+        # exponentially weighted average of request latency in seconds
+        self.latency = 1.0
+        self.block_number = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state == CircuitBreaker.CLOSED
+
+    def observe(self, latency: float):
+        self.latency = self.latency * 0.8 + latency * 0.2
+
+
+class RpcPool:
+    """
+    Shared set of RPC endpoints of one chain. A background thread measures latency
+    and block height of every endpoint; requests go to healthy endpoints with
+    probability proportional to their speed. An endpoint is ejected when its circuit
+    breaker opens and brought back once a probe succeeds.
+    """
+
+    def __init__(self, chain: str, urls: list[str], probe_interval: float = 30, max_block_lag: int = 20):
+        self.chain = chain
+        self.endpoints = [RpcEndpoint(url) for url in dict.fromkeys(urls)]
+        self.probe_interval = probe_interval
+        self.max_block_lag = max_block_lag
+
+        self._prober: threading.Thread | None = None
+
+    def choose(self, exclude: set[str] = frozenset()) -> RpcEndpoint:
+        candidates = [e for e in self.endpoints if e.healthy and e.url not in exclude]
+        if not candidates:
+            # everything is ejected, take the one that is closest to being retried
+            candidates = [e for e in self.endpoints if e.url not in exclude] or self.endpoints
+            return min(candidates, key=lambda e: e.breaker.remaining())
+
+        weights = [1 / max(e.latency, 0.01) for e in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def best(self) -> RpcEndpoint:
+        healthy = [e for e in self.endpoints if e.healthy] or self.endpoints
+        return min(healthy, key=lambda e: e.latency)
+
+    def report_success(self, endpoint: RpcEndpoint, latency: float):
+        endpoint.observe(latency)
+        endpoint.breaker.record_success()
+
+    def report_failure(self, endpoint: RpcEndpoint):
+        endpoint.breaker.record_failure()
+
+    def start(self):
+        if len(self.endpoints) < 2 or self._prober:
+            return
+        self._prober = threading.Thread(target=self._probe_loop, name=f"rpc-prober-{self.chain}", daemon=True)
+        self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            self.probe()
+            time.sleep(self.probe_interval)
+
+    def probe(self):
+        alive = []
+        for endpoint in self.endpoints:
+            start = time.monotonic()
+            try:
+                response = requests.post(
+                    endpoint.url,
+                    json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
+                    timeout=10,
+                )
+                endpoint.block_number = int(response.json()["result"], 16)
+                endpoint.observe(time.monotonic() - start)
+                alive.append(endpoint)
+            except Exception as err:
+                logger.debug(f"{self.chain} | Probe of {endpoint.name} failed: {err}")
+                self._eject(endpoint, "health check failed")
+
+        if not alive:
+            return
+
+        head = max(e.block_number for e in alive)
+        for endpoint in alive:
+            lag = head - endpoint.block_number
+            if lag > self.max_block_lag:
+                self._eject(endpoint, f"{lag} blocks behind")
+            else:
+                if not endpoint.healthy:
+                    logger.info(f"{self.chain} | RPC {endpoint.name} is healthy again")
+                endpoint.breaker.record_success()
+
+    def _eject(self, endpoint: RpcEndpoint, reason: str):
+        if endpoint.healthy:
+            logger.warning(f"{self.chain} | RPC {endpoint.name} ejected: {reason}")
+        endpoint.breaker.trip()
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """
+    Routes every request of an account to an endpoint of the shared pool, using the
+    account's own session (proxy). Failing endpoints are reported to the pool and the
+    request is retried on another one with backoff.
+
+    Requests are posted with the session directly instead of web3's HTTPProvider,
+    which caches a session per thread and would send everything not issued from the
+    thread that created the provider (broadcast jobs, other workers) without proxy.
+    """
+
+    def __init__(self, pool: RpcPool, session: requests.Session | None = None):
+        super().__init__()
+        self.pool = pool
+        self.session = session or _shared_session
+
+    def __str__(self) -> str:
+        return f"RPC pool {self.pool.chain}"
+
+    def _send(self, endpoint: RpcEndpoint, request_data: bytes, method: str = ""):
+        start = time.monotonic()
+        try:
+            with limited(endpoint_limiter(rpc_dependency(self.pool.chain), method or "batch")):
+                raw_response = self.session.post(
+                    endpoint.url,
+                    data=request_data,
+                    headers={"Content-Type": "application/json"},
+                    timeout=REQUEST_TIMEOUT,
+                )
+                raw_response.raise_for_status()
+                response = self.decode_rpc_response(raw_response.content)
+                error = response.get("error") if isinstance(response, dict) else None
+                if error and is_endpoint_failure(RpcEndpointError(error.get("message", ""))):
+                    raise RpcEndpointError(f"{endpoint.name}: {error.get('message')}")
+        except Exception as err:
+            events.emit(
+                "rpc",
+                "error",
+                endpoint.name,
+                time.monotonic() - start,
+                chain=self.pool.chain,
+                method=method,
+                error=type(err).__name__,
+            )
+            trace.record(method or "batch", "rpc", start, chain=self.pool.chain, endpoint=endpoint.name, error=type(err).__name__)
+            if is_endpoint_failure(err):
+                self.pool.report_failure(endpoint)
+            else:
+                endpoint.breaker.record_success()
+            raise
+
+        latency = time.monotonic() - start
+        events.emit("rpc", "ok", endpoint.name, latency, chain=self.pool.chain, method=method)
+        trace.record(method or "batch", "rpc", start, chain=self.pool.chain, endpoint=endpoint.name)
+        if recorder.recorder:
+            payload = json.loads(request_data)
+            params = payload["params"] if isinstance(payload, dict) else payload
+            recorder.recorder.record_rpc(self.pool.chain, method, params, response, latency)
+        self.pool.report_success(endpoint, latency)
+        return response
+
+    def _call(self, request_data: bytes, method: str):
+        tried: set[str] = set()
+
+        def attempt():
+            endpoint = self.pool.choose(exclude=tried)
+            if not endpoint.healthy:
+                # no healthy endpoint left, wait for the pause instead of hammering it
+                endpoint.breaker.wait(default_policy.max_delay * default_policy.attempts)
+            tried.add(endpoint.url)
+            if len(tried) == len(self.pool.endpoints):
+                tried.clear()
+            return self._send(endpoint, request_data, method)
+
+        return default_policy.call(attempt, log_indicator=f"{self.pool.chain} {method}")
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = self._call(request_data, method)
+        if method == "eth_sendRawTransaction" and is_already_known(response):
+            # a retry after a timeout reached a node that got the first attempt
+            tx_hash = HexBytes(keccak(HexBytes(params[0])))
+            response = {"jsonrpc": "2.0", "id": response.get("id"), "result": tx_hash.to_0x_hex()}
+        return response
+
+    def broadcast(self, raw_transaction: bytes) -> HexBytes:
+        """
+        Submit a signed transaction to every endpoint of the pool at once and return
+        as soon as one of them accepts it. "already known" counts as accepted.
+        """
+        tx_hash = HexBytes(keccak(raw_transaction))
+        request_data = self.encode_rpc_request(
+            "eth_sendRawTransaction", [HexBytes(raw_transaction).to_0x_hex()]
+        )
+
+        def submit(endpoint: RpcEndpoint):
+            response = self._send(endpoint, request_data, "eth_sendRawTransaction")
+            error = response.get("error")
+            if error and not is_already_known(response):
+                raise RpcEndpointError(f"{endpoint.name}: {error.get('message')}")
+            return endpoint
+
+        futures = [_broadcast_executor.submit(submit, endpoint) for endpoint in self.pool.endpoints]
+        last_error = None
+        for future in as_completed(futures):
+            try:
+                endpoint = future.result()
+                logger.debug(f"{self.pool.chain} | {tx_hash.to_0x_hex()} accepted by {endpoint.name}")
+                return tx_hash
+            except Exception as err:
+                last_error = err
+
+        raise last_error
+
+    def make_batch_request(self, batch_requests):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        responses = self._call(request_data, "batch")
+        return sort_batch_response_by_response_ids(responses)
+
+
+class ReplayProvider(JSONBaseProvider):
+    """Answers JSON-RPC calls from recorded fixtures, see extra.recorder"""
+
+    def __init__(self, chain: str, fixtures: recorder.Fixtures):
+        super().__init__()
+        self.chain = chain
+        self.fixtures = fixtures
+
+    def make_request(self, method, params):
+        response = dict(self.fixtures.next(f"{self.chain} {method}")["response"])
+        response["id"] = next(self.request_counter)
+        return response
+
+    def make_batch_request(self, batch_requests):
+        # responses of a batch are recorded in the order the endpoint sent them
+        return sort_batch_response_by_response_ids(self.fixtures.next(f"{self.chain} batch")["response"])
+
+    def broadcast(self, raw_transaction: bytes) -> HexBytes:
+        return HexBytes(keccak(raw_transaction))
+
+
+# session of pools used without an account, e.g. by the deposit tracker
+_shared_session = requests.Session()
+_broadcast_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="rpc-broadcast")
+
+_pools: dict[str, RpcPool] = {}
+_pools_lock = threading.Lock()
+_pool_settings = {"probe_interval": 30, "max_block_lag": 20}
+_broadcast = {"enabled": False}
+
+
+def as_rpc_list(rpc: str | list[str]) -> list[str]:
+    return [rpc] if isinstance(rpc, str) else list(rpc)
+
+
+def get_pool(chain: str, rpc: str | list[str]) -> RpcPool:
+    with _pools_lock:
+        pool = _pools.get(chain)
+        if pool is None:
+            pool = RpcPool(chain, as_rpc_list(rpc), **_pool_settings)
+            pool.start()
+            _pools[chain] = pool
+        return pool
+
+
+def configure(config: dict):
+    """Apply the `rpc_pool` section of config.yaml to pools created after this call"""
+    settings = config.get("rpc_pool", {})
+    _pool_settings["probe_interval"] = settings.get("probe_interval", _pool_settings["probe_interval"])
+    _pool_settings["max_block_lag"] = settings.get("max_block_lag", _pool_settings["max_block_lag"])
+    _broadcast["enabled"] = settings.get("broadcast_transactions", _broadcast["enabled"])
+
+
+def send_raw_transaction(w3: Web3, raw_transaction: bytes) -> HexBytes:
+    """Send through every RPC of the chain when broadcast is enabled, otherwise through one"""
+    if _broadcast["enabled"] and isinstance(w3.provider, (PooledHTTPProvider, ReplayProvider)):
+        return w3.provider.broadcast(raw_transaction)
+    return w3.eth.send_raw_transaction(raw_transaction)
+
+
+def create_web3(chain: str, rpc: str | list[str], session=None) -> Web3:
+    if recorder.fixtures:
+        w3 = Web3(ReplayProvider(chain, recorder.fixtures))
+    else:
+        w3 = Web3(PooledHTTPProvider(get_pool(chain, rpc), session=session))
+    w3.middleware_onion.inject(ExtraDataToPOAMiddleware, name="extradata_to_poa", layer=0)
+    return w3
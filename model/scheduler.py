@@ -0,0 +1,58 @@
+import datetime
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+
+from model.account import AccountRecord
+from model.tasks import utc_day_start
+
+
+class DueScheduler:
+    """
+    Keeps accounts ordered by the time they are due next. Every account gets a stable
+    offset inside the UTC day, so daily missions are spread over `spread_hours`
+    instead of being done by every account right after midnight.
+    """
+
+    def __init__(self, spread_hours: float = 24):
+        self.spread_seconds = max(1, int(spread_hours * 3600))
+        self._heap: list[tuple[float, int, AccountRecord]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def offset(self, account: AccountRecord) -> int:
+        digest = hashlib.sha256(account.private_key.encode()).digest()
+        return int.from_bytes(digest[:8], "big") % self.spread_seconds
+
+    def first_due(self, account: AccountRecord, now: datetime.datetime | None = None) -> datetime.datetime:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        due = utc_day_start(now) + datetime.timedelta(seconds=self.offset(account))
+        return max(due, now)
+
+    def next_due(self, account: AccountRecord, now: datetime.datetime | None = None) -> datetime.datetime:
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        tomorrow = utc_day_start(now) + datetime.timedelta(days=1)
+        return tomorrow + datetime.timedelta(seconds=self.offset(account))
+
+    def push(self, account: AccountRecord, due: datetime.datetime):
+        with self._condition:
+            heapq.heappush(self._heap, (due.timestamp(), next(self._counter), account))
+            self._condition.notify()
+
+    def pop_due(self, stop: threading.Event) -> AccountRecord | None:
+        """Block until the earliest account is due, None when stop is set"""
+        with self._condition:
+            while not stop.is_set():
+                if self._heap:
+                    wait = self._heap[0][0] - time.time()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap)[2]
+                else:
+                    wait = None
+                self._condition.wait(timeout=min(wait, 5) if wait is not None else 5)
+        return None
+
+    def __len__(self):
+        return len(self._heap)
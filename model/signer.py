@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+
+import rlp
+from eth_account import Account
+from eth_account.messages import defunct_hash_message
+from eth_keys import keys
+from eth_utils import keccak, to_bytes, to_canonical_address
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+
+@dataclass(slots=True)
+class SignedTx:
+    raw_transaction: bytes
+    hash: bytes
+
+
+def _int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def _bytes(value) -> bytes:
+    if not value:
+        return b""
+    return to_bytes(hexstr=value) if isinstance(value, str) else bytes(value)
+
+
+def _address(value) -> bytes:
+    return to_canonical_address(value) if value else b""
+
+
+class Signer:
+    """
+    Signing key of one account, parsed once. EIP-1559 and EIP-155 transactions are
+    RLP encoded here and signed with coincurve when it is installed; anything else
+    (access lists, blobs) falls back to eth_account.
+    """
+
+    def __init__(self, private_key: str):
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+        secret = bytes(self.account.key)
+        self._eth_keys_key = keys.PrivateKey(secret)
+        self._coincurve_key = coincurve.PrivateKey(secret) if coincurve else None
+
+    @property
+    def backend(self) -> str:
+        return "coincurve" if self._coincurve_key else "eth_keys"
+
+    def _sign_hash(self, message_hash: bytes) -> tuple[int, int, int]:
+        """(recovery id, r, s) of a 32 byte hash"""
+        if self._coincurve_key:
+            signature = self._coincurve_key.sign_recoverable(message_hash, hasher=None)
+            return (
+                signature[64],
+                int.from_bytes(signature[:32], "big"),
+                int.from_bytes(signature[32:64], "big"),
+            )
+        signature = self._eth_keys_key.sign_msg_hash(message_hash)
+        return signature.v, signature.r, signature.s
+
+    def sign_transaction(self, transaction: dict) -> SignedTx:
+        if transaction.get("accessList") or transaction.get("blobVersionedHashes"):
+            return self._sign_with_eth_account(transaction)
+
+        tx_type = _int(transaction.get("type", 0))
+        if tx_type == 2:
+            return self._sign_dynamic_fee(transaction)
+        if tx_type == 0 and "gasPrice" in transaction and "chainId" in transaction:
+            return self._sign_legacy(transaction)
+        return self._sign_with_eth_account(transaction)
+
+    def _sign_dynamic_fee(self, transaction: dict) -> SignedTx:
+        fields = [
+            _int(transaction["chainId"]),
+            _int(transaction["nonce"]),
+            _int(transaction["maxPriorityFeePerGas"]),
+            _int(transaction["maxFeePerGas"]),
+            _int(transaction["gas"]),
+            _address(transaction.get("to")),
+            _int(transaction.get("value", 0)),
+            _bytes(transaction.get("data", b"")),
+            [],
+        ]
+        recovery_id, r, s = self._sign_hash(keccak(b"\x02" + rlp.encode(fields)))
+        raw = b"\x02" + rlp.encode(fields + [recovery_id, r, s])
+        return SignedTx(raw, keccak(raw))
+
+    def _sign_legacy(self, transaction: dict) -> SignedTx:
+        chain_id = _int(transaction["chainId"])
+        fields = [
+            _int(transaction["nonce"]),
+            _int(transaction["gasPrice"]),
+            _int(transaction["gas"]),
+            _address(transaction.get("to")),
+            _int(transaction.get("value", 0)),
+            _bytes(transaction.get("data", b"")),
+        ]
+        recovery_id, r, s = self._sign_hash(keccak(rlp.encode(fields + [chain_id, 0, 0])))
+        raw = rlp.encode(fields + [recovery_id + chain_id * 2 + 35, r, s])
+        return SignedTx(raw, keccak(raw))
+
+    def _sign_with_eth_account(self, transaction: dict) -> SignedTx:
+        transaction = {key: value for key, value in transaction.items() if key != "from"}
+        signed = self.account.sign_transaction(transaction)
+        return SignedTx(bytes(signed.raw_transaction), bytes(signed.hash))
+
+    def sign_message(self, text: str) -> bytes:
+        """EIP-191 personal_sign signature, 65 bytes with v = 27/28"""
+        recovery_id, r, s = self._sign_hash(bytes(defunct_hash_message(text=text)))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big") + bytes([recovery_id + 27])
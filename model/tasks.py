@@ -0,0 +1,168 @@
+import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from loguru import logger
+
+from extra import events
+from model.api import Task, UserTask
+
+
+def parse_api_time(value: str) -> datetime.datetime:
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=datetime.timezone.utc
+    )
+
+
+def utc_day_start(now: datetime.datetime | None = None) -> datetime.datetime:
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def format_api_time(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass
+class TaskState:
+    """Local copy of one task and its user_task history, updated after every action"""
+
+    task_id: int
+    user_tasks: list[UserTask] = field(default_factory=list)
+
+    @classmethod
+    def from_api(cls, task: Task) -> "TaskState":
+        return cls(task.id, list(task.user_task))
+
+    @property
+    def last(self) -> UserTask | None:
+        return self.user_tasks[-1] if self.user_tasks else None
+
+    def done_today(self) -> bool:
+        return bool(self.last) and parse_api_time(self.last.updated_at) >= utc_day_start()
+
+    def claimable(self) -> bool:
+        return bool(self.last) and not self.last.tx_hash
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    task_id: int
+    # handler(xterio, task_id) -> True when done, False when failed, None when skipped
+    handler: Callable
+    # daily tasks are repeated once per UTC day, the rest only once
+    daily: bool = False
+    # tasks that have to be done before this one
+    depends_on: tuple[int, ...] = ()
+    # only talks to api.xter.io, so it can run together with other such tasks
+    concurrent: bool = False
+
+    def is_due(self, state: TaskState) -> bool:
+        if not state.last:
+            return True
+        return self.daily and not state.done_today()
+
+
+def _apply_invite_code(xterio, task_id: int):
+    ref_code = random.choice(xterio.config["invite"]["invite_codes"])
+    if not ref_code:
+        return None
+    return xterio.apply_invite_code(ref_code)
+
+
+def _send_chat_messages(xterio, task_id: int):
+    return xterio.send_chat_messages()
+
+
+def _report_task(xterio, task_id: int):
+    return xterio.complete_task(task_id)
+
+
+# 16: invite code, 11: AI chat, 18: share ai mission, 20-24: social missions
+TASKS: dict[int, TaskSpec] = {
+    spec.task_id: spec
+    for spec in (
+        TaskSpec(16, _apply_invite_code),
+        TaskSpec(11, _send_chat_messages, daily=True),
+        TaskSpec(18, _report_task, daily=True, concurrent=True),
+        TaskSpec(20, _report_task, concurrent=True),
+        TaskSpec(21, _report_task, concurrent=True),
+        TaskSpec(22, _report_task, concurrent=True),
+        TaskSpec(23, _report_task, concurrent=True),
+        TaskSpec(24, _report_task, concurrent=True),
+    )
+}
+
+
+def _run_task(xterio, spec: TaskSpec, state: TaskState, context: dict | None = None) -> bool:
+    if context is not None:
+        events.bind(**context)
+
+    with events.timed("task", task_id=spec.task_id) as event:
+        result = spec.handler(xterio, spec.task_id)
+        event.outcome = "failed" if result is False else "ok" if result else "skipped"
+
+    if result:
+        logger.info(f"{xterio.address} | Completed {spec.task_id} mission.")
+    return result is not False
+
+
+def run_due_tasks(xterio, states: dict[int, TaskState], pause: Callable[[], None]):
+    """
+    Run every due registered task. Tasks are started in waves as their dependencies
+    finish: the tasks of a wave that are not concurrent run one by one in the calling
+    thread first, then the concurrent ones together in a thread pool.
+    """
+    pending = {
+        task_id: spec
+        for task_id, spec in TASKS.items()
+        if task_id in states and spec.is_due(states[task_id])
+    }
+    finished: set[int] = set(task_id for task_id in states if task_id not in pending)
+    failed: set[int] = set()
+
+    while pending:
+        for spec in list(pending.values()):
+            if failed.intersection(spec.depends_on):
+                logger.warning(f"{xterio.address} | Skipped {spec.task_id} mission, its dependency failed.")
+                failed.add(spec.task_id)
+                del pending[spec.task_id]
+
+        wave = [
+            spec
+            for spec in pending.values()
+            if all(dep in finished or dep not in states for dep in spec.depends_on)
+        ]
+        if not wave:
+            if pending:
+                logger.error(f"{xterio.address} | Unresolvable task dependencies: {list(pending)}")
+            return
+
+        concurrent = [spec for spec in wave if spec.concurrent]
+        sequential = [spec for spec in wave if not spec.concurrent]
+
+        results = {}
+        for spec in sequential:
+            results[spec.task_id] = _run_task(xterio, spec, states[spec.task_id])
+            pause()
+
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=len(concurrent)) as executor:
+                context = events.context()
+                futures = {
+                    spec.task_id: executor.submit(
+                        _run_task, xterio, spec, states[spec.task_id], context
+                    )
+                    for spec in concurrent
+                }
+                for task_id, future in futures.items():
+                    results[task_id] = future.result()
+
+        for spec in wave:
+            del pending[spec.task_id]
+            if results[spec.task_id]:
+                finished.add(spec.task_id)
+            else:
+                failed.add(spec.task_id)
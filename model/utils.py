@@ -4,6 +4,8 @@ import time
 
 from loguru import logger
 
+from model.retry import default_policy
+
 
 def random_pause(start, end):
     time.sleep(random.randint(start, end))
@@ -17,6 +19,8 @@ def retry(attempts: int, return_by_default: any, log_indicator: str | int = "-")
                 result = func(*args, **kwargs)
                 if result is False:
                     logger.error(f"{log_indicator} | Attempt {attempt} failed, retrying...")
+                    if attempt < attempts:
+                        default_policy.sleep(attempt)
                 else:
                     return result
             logger.error(f"{log_indicator} | All attempts failed, returning default value.")
@@ -1,183 +1,247 @@
-import datetime
-import json
 import random
+import threading
 import time
 import traceback
+from urllib.parse import urlparse
+
 import requests as default_requests
 from loguru import logger
-from eth_account import Account
-from eth_account.messages import encode_defunct
 from eth_typing import ChecksumAddress
 from web3 import Web3
-from web3.middleware import ExtraDataToPOAMiddleware
+from web3.exceptions import TransactionNotFound
 from curl_cffi import requests
 
+from extra import events, recorder, trace
 from extra.client import create_client
 from extra.converter import mnemonic_to_private_key
-from model import constants
+from model import cache, constants
+from model.account import AccountRecord
+from model.api import API_URL, AlreadyAppliedError, ApiError, Scene, Task, XterioApi
 from data import chat_messages
 from model.binance import withdraw
+from model.bridge_tracker import DepositTracker
 from model.captcha_solver import CaptchaSolver
-from model.gpt import ask_chatgpt
+from model.gpt import ask_chatgpt_cached
+from model.limiter import CAPTCHA, XTERIO_API, endpoint_limiter, limited
+from model.retry import default_policy, get_breaker, raise_for_retryable_status
+from model.rpc import as_rpc_list, create_web3, send_raw_transaction
+from model.signer import Signer
+from model.tasks import TaskState, run_due_tasks
+
+XTERIO_API_ENDPOINT = "api.xter.io"
+CAPTCHA_ENDPOINT = "bcsapi.xyz"
+
+
+class StopRequested(Exception):
+    """The run is stopping, raised between on-chain steps of an account"""
 
 
 class Xterio:
-    def __init__(self, private_key, proxy, config):
+    def __init__(self, private_key, proxy, config, token: str = ""):
         self.private_key = private_key
         self.proxy = proxy
         self.config = config
+        self.token = token
 
-        self.eth_w3: Web3 | None = None
-        self.bsc_w3: Web3 | None = None
+        self._eth_w3: Web3 | None = None
+        self._bsc_w3: Web3 | None = None
+        self._rpc_session: default_requests.Session | None = None
         self.address: ChecksumAddress | None = None
         self.client: requests.Session | None = None
+        self.signer: Signer | None = None
+        self.api = XterioApi(self._request, self._reauthenticate)
 
         self.is_captcha_solved_for_chat = False
+        # BSC hash of the last bridge transaction sent by this instance
+        self.bridge_tx = ""
+        # set when the run is interrupted, checked before every claim transaction
+        self.stop: threading.Event | None = None
+
+    @classmethod
+    def from_record(cls, record: AccountRecord, config: dict) -> "Xterio":
+        return cls(record.private_key, record.proxy, config, token=record.token)
 
     def init_instance(self):
-        for _ in range(5):
-            try:
-                if len(self.private_key.split()) > 1:
-                    self.private_key = mnemonic_to_private_key(self.private_key)
+        # requests retry inside _request and the RPC provider, no second layer here
+        try:
+            self._init_clients()
+            return True
+        except Exception as err:
+            logger.error(f"{self.address} | Failed to init client: {err}")
 
-                account = Account.from_key(self.private_key)
-                self.address = account.address
+        return False
 
-                session = default_requests.Session()
+    def _init_clients(self):
+        if len(self.private_key.split()) > 1:
+            self.private_key = mnemonic_to_private_key(self.private_key)
 
-                if self.proxy:
-                    session.proxies.update(
-                        {
-                            "http": f"http://{self.proxy}",
-                            "https": f"http://{self.proxy}",
-                        }
-                    )
+        if self.signer is None:
+            self.signer = Signer(self.private_key)
+        self.address = self.signer.address
 
-                self.eth_w3 = Web3(
-                    Web3.HTTPProvider(
-                        self.config["bridge_to_xterio"]["XTERIO_RPC"], session=session
-                    )
-                )
-                self.eth_w3.middleware_onion.inject(
-                    ExtraDataToPOAMiddleware, name="extradata_to_poa", layer=0
-                )
+        if self.client is None:
+            self.client = create_client(self.proxy)
 
-                self.bsc_w3 = Web3(
-                    Web3.HTTPProvider(
-                        self.config["bridge_to_xterio"]["BNB_RPC"], session=session
-                    )
-                )
-                self.bsc_w3.middleware_onion.inject(
-                    ExtraDataToPOAMiddleware, name="extradata_to_poa", layer=0
-                )
+        if self.token:
+            self.client.headers.update({"authorization": self.token})
+            return
 
-                self.client = create_client(self.proxy)
+        ok, _ = self._sign_in()
+        if not ok:
+            raise Exception("unable to sign in")
 
-                self._sign_in()
-
-                return True
+    @property
+    def eth_w3(self) -> Web3:
+        if self._eth_w3 is None:
+            self._eth_w3 = create_web3(
+                "xterio",
+                self.config["bridge_to_xterio"]["XTERIO_RPC"],
+                session=self._get_rpc_session(),
+            )
+        return self._eth_w3
+
+    @property
+    def bsc_w3(self) -> Web3:
+        if self._bsc_w3 is None:
+            self._bsc_w3 = create_web3(
+                "bsc",
+                self.config["bridge_to_xterio"]["BNB_RPC"],
+                session=self._get_rpc_session(),
+            )
+        return self._bsc_w3
+
+    def _get_rpc_session(self) -> default_requests.Session:
+        if self._rpc_session is None:
+            self._rpc_session = default_requests.Session()
+
+            if self.proxy:
+                self._rpc_session.proxies.update(
+                    {
+                        "http": f"http://{self.proxy}",
+                        "https": f"http://{self.proxy}",
+                    }
+                )
+        return self._rpc_session
+
+    def prewarm(self, timeout: float = 5):
+        """
+        Open the connections the first steps of the account use: api.xter.io through
+        the account's client and every RPC through its RPC session. The sessions keep
+        them alive, so the first real requests skip DNS, TCP and TLS setup. Failures are
+        ignored, the real requests have their own retries.
+        """
+        if recorder.fixtures:
+            return
+        if self.client is None:
+            self.client = create_client(self.proxy)
+
+        with trace.span("prewarm", "network"):
+            try:
+                self.client.request("HEAD", f"{API_URL}/", timeout=timeout)
             except Exception as err:
-                logger.error(f"{self.address} | Failed to init client: {err}")
-
-        return False
+                logger.debug(f"{self.proxy or '-'} | Failed to prewarm {XTERIO_API_ENDPOINT}: {err}")
 
-    def complete_all_tasks(self):
+            session = self._get_rpc_session()
+            for key in ("XTERIO_RPC", "BNB_RPC"):
+                for url in as_rpc_list(self.config["bridge_to_xterio"][key]):
+                    try:
+                        session.post(
+                            url,
+                            json={"jsonrpc": "2.0", "id": 0, "method": "eth_chainId", "params": []},
+                            timeout=timeout,
+                        )
+                    except Exception as err:
+                        logger.debug(f"{self.proxy or '-'} | Failed to prewarm {url}: {err}")
+
+    def release_chain_clients(self):
+        """Drop Web3 objects and their session, they are recreated on next use"""
+        if self._rpc_session is not None:
+            self._rpc_session.close()
+        self._rpc_session = None
+        self._eth_w3 = None
+        self._bsc_w3 = None
+
+    def release(self):
+        """Close every connection of the account, called when its flow is finished"""
+        self.release_chain_clients()
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def open_resources(self) -> list[str]:
+        """Connections and clients still held, empty after release()"""
+        resources = {
+            "client": self.client,
+            "rpc_session": self._rpc_session,
+            "eth_w3": self._eth_w3,
+            "bsc_w3": self._bsc_w3,
+        }
+        return [name for name, resource in resources.items() if resource is not None]
+
+    def _request(self, method: str, url: str, **kwargs):
+        """Request to api.xter.io through the shared retry policy and circuit breaker"""
+        path = urlparse(url).path
+        # the wallet address in login paths would give every account its own limiter and
+        # its own row in the run summary
+        endpoint = "/".join("*" if part.lower().startswith("0x") else part for part in path.split("/"))
+
+        def request():
+            with limited(endpoint_limiter(XTERIO_API, endpoint)), events.timed("api", f"{XTERIO_API_ENDPOINT}{endpoint}") as event:
+                response = self.client.request(method, url, **kwargs)
+                event.fields["status"] = response.status_code
+                return raise_for_retryable_status(response)
+
+        return default_policy.call(
+            request,
+            endpoint=XTERIO_API_ENDPOINT,
+            log_indicator=self.address,
+            # a POST that timed out may have been processed (chat message, task report)
+            idempotent=method.upper() != "POST",
+        )
 
-        tasks = self._get_tasks()
+    def check_stop(self):
+        if self.stop is not None and self.stop.is_set():
+            raise StopRequested("run is stopping")
 
-        for task in tasks["list"]:
-            if task["ID"] == 16:
-                if not task["user_task"]:
-                    ref_code = random.choice(self.config["invite"]["invite_codes"])
-                    if ref_code:
-                        self.apply_invite_code(ref_code)
+    def complete_all_tasks(self):
+        states = {task.id: TaskState.from_api(task) for task in self._get_tasks()}
 
-            if task["ID"] == 11:
-                if not task["user_task"]:
-                    self.send_chat_messages()
-                else:
-                    data = task["user_task"][-1]
-                    updated = data["UpdatedAt"]
-                    date_obj = datetime.datetime.strptime(
-                        updated, "%Y-%m-%dT%H:%M:%SZ"
-                    ).replace(tzinfo=datetime.timezone.utc)
+        run_due_tasks(self, states, self._pause_between_tasks)
 
-                    # Получаем текущее время в UTC
-                    now_utc = datetime.datetime.now(datetime.timezone.utc)
+        # claim only what api.xter.io lists as completed and not claimed yet, a task
+        # that failed or was done before must not cost a claim transaction
+        states = {task.id: TaskState.from_api(task) for task in self._get_tasks()}
 
-                    today_start = now_utc.replace(
-                        hour=0, minute=0, second=0, microsecond=0
+        for state in states.values():
+            if state.claimable():
+                self.check_stop()
+                result = self.claim_mission(state.task_id)
+                if result:
+                    logger.success(
+                        f"{self.address} | Completed claim {state.task_id} mission."
                     )
-
-                    # Если date_obj меньше ачала текущего дня, значит обновление было не сегодня
-                    is_yesterday = date_obj < today_start
-
-                    if is_yesterday:
-                        self.send_chat_messages()
-                        time.sleep(random.randint(5, 8))
-                        self.claim_mission(task["ID"])
-
-            if task["ID"] in [18, 20, 21, 22, 23, 24]:
-                if not task["user_task"]:
-                    result = self.complete_task(task["ID"])
-                    if not result:
-                        continue
-                elif task["ID"] == 18 and task["user_task"]:
-                    data = task["user_task"][-1]
-                    updated = data["UpdatedAt"]
-                    date_obj = datetime.datetime.strptime(
-                        updated, "%Y-%m-%dT%H:%M:%SZ"
-                    ).replace(tzinfo=datetime.timezone.utc)
-
-                    # Получаем текущее время в UTC
-                    now_utc = datetime.datetime.now(datetime.timezone.utc)
-
-                    today_start = now_utc.replace(
-                        hour=0, minute=0, second=0, microsecond=0
+                else:
+                    logger.error(
+                        f"{self.address} | Failed to claim {state.task_id} mission."
                     )
 
-                    # Если date_obj меньше начала текущего дня, значит обновление было не сегодня
-                    is_yesterday = date_obj < today_start
-
-                    if is_yesterday:
-                        result = self.complete_task(task["ID"])
-                        if not result:
-                            continue
-
-                logger.info(f"{self.address} | Completed {task['ID']} mission.")
-
-            time.sleep(
-                random.randint(
-                    self.config["settings"]["pause_between_tasks"][0],
-                    self.config["settings"]["pause_between_tasks"][1],
-                )
-            )
-
-        tasks = self._get_tasks()
-        for task in tasks["list"]:
-            if task["user_task"]:
-                if not task["user_task"][-1]["tx_hash"]:
-                    result = self.claim_mission(task["ID"])
-                    if result:
-                        logger.success(
-                            f"{self.address} | Completed claim {task['ID']} mission."
-                        )
-                    else:
-                        logger.error(
-                            f"{self.address} | Failed to claim {task['ID']} mission."
-                        )
-
-                time.sleep(
-                    random.randint(
-                        self.config["settings"]["pause_between_tasks"][0],
-                        self.config["settings"]["pause_between_tasks"][1],
-                    )
-                )
+                self._pause_between_tasks()
 
+        self.check_stop()
         self.claim_chat_score()
 
         return True
 
+    def _pause_between_tasks(self):
+        trace.sleep(
+            random.randint(
+                self.config["settings"]["pause_between_tasks"][0],
+                self.config["settings"]["pause_between_tasks"][1],
+            ),
+            "pause_between_tasks",
+            self.stop,
+        )
+
     def claim_mission(self, task_id):
         try:
             contract_address = Web3.to_checksum_address(
@@ -225,14 +289,22 @@ class Xterio:
                 "gas": int(gas_estimate * 1.15),
             }
 
-            signed_transaction = self.eth_w3.eth.account.sign_transaction(
-                transaction, private_key=self.private_key
-            )
+            with trace.span("sign_transaction", "cpu"):
+                signed_transaction = self.signer.sign_transaction(transaction)
 
-            tx_hash = self.eth_w3.eth.send_raw_transaction(
-                signed_transaction.raw_transaction
+            tx_hash = send_raw_transaction(
+                self.eth_w3, signed_transaction.raw_transaction
+            )
+            with trace.span("wait_for_receipt", "wait", chain="xterio"):
+                receipt = self.eth_w3.eth.wait_for_transaction_receipt(tx_hash)
+            events.emit(
+                "claim_mission",
+                "ok" if receipt.status == 1 else "reverted",
+                chain="xterio",
+                address=self.address,
+                task_id=task_id,
+                tx_hash="0x" + tx_hash.hex(),
             )
-            receipt = self.eth_w3.eth.wait_for_transaction_receipt(tx_hash)
 
             if receipt.status == 1:
                 logger.success(
@@ -241,23 +313,9 @@ class Xterio:
             else:
                 raise Exception(f"Transaction failed: {tx_hash.hex()}")
 
-            tx = "0x" + tx_hash.hex()
-
-            json_data = {
-                "task_id": task_id,
-                "tx_hash": tx,
-                "is_by_bit": 1,
-            }
-
-            response = self.client.post(
-                "https://api.xter.io/ai/v1/user/task", json=json_data
-            )
-
-            if response.json()["err_code"] != 0:
-                raise Exception(response.text)
-            else:
-                logger.success(f"{self.address} | Complete claim {task_id} mission.")
-                return True
+            self.api.submit_task(task_id, "0x" + tx_hash.hex())
+            logger.success(f"{self.address} | Complete claim {task_id} mission.")
+            return True
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to claim mission: {err}")
@@ -265,15 +323,9 @@ class Xterio:
 
     def claim_chat_score(self):
         try:
-            response = self.client.get("https://api.xter.io/ai/v1/user/chat")
-
-            if response.json()["err_code"] != 0:
-                raise Exception(response.text)
-            else:
-                claim_status = response.json()["data"]["claim_status"]
-                if claim_status == 2:
-                    logger.info(f"{self.address} | Already claimed chat score")
-                    return True
+            if self.api.chat_claim_status() == 2:
+                logger.info(f"{self.address} | Already claimed chat score")
+                return True
 
             contract_address = Web3.to_checksum_address(
                 "0x7bb85350e3a883A1708648AB7e37cEf4651cFd48"
@@ -318,14 +370,21 @@ class Xterio:
                 "gas": int(gas_estimate * 1.15),
             }
 
-            signed_transaction = self.eth_w3.eth.account.sign_transaction(
-                transaction, private_key=self.private_key
-            )
+            with trace.span("sign_transaction", "cpu"):
+                signed_transaction = self.signer.sign_transaction(transaction)
 
-            tx_hash = self.eth_w3.eth.send_raw_transaction(
-                signed_transaction.raw_transaction
+            tx_hash = send_raw_transaction(
+                self.eth_w3, signed_transaction.raw_transaction
+            )
+            with trace.span("wait_for_receipt", "wait", chain="xterio"):
+                receipt = self.eth_w3.eth.wait_for_transaction_receipt(tx_hash)
+            events.emit(
+                "claim_chat_score",
+                "ok" if receipt.status == 1 else "reverted",
+                chain="xterio",
+                address=self.address,
+                tx_hash="0x" + tx_hash.hex(),
             )
-            receipt = self.eth_w3.eth.wait_for_transaction_receipt(tx_hash)
 
             if receipt.status != 1:
                 raise Exception(f"Transaction failed: {tx_hash.hex()}")
@@ -357,17 +416,8 @@ class Xterio:
 
     def complete_task(self, task_id):
         try:
-            json_data = {
-                "task_id": task_id,
-            }
-
-            response = self.client.post(
-                "https://api.xter.io/ai/v1/user/task/report", json=json_data
-            )
-            if response.json()["err_code"] != 0:
-                raise Exception(response.text)
-            else:
-                return True
+            self.api.report_task(task_id)
+            return True
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to complete task: {err}")
@@ -375,22 +425,14 @@ class Xterio:
 
     def apply_invite_code(self, ref_code):
         try:
-            json_data = {"code": ref_code}
-            response = self.client.post(
-                "https://api.xter.io/ai/v1/user/invite/apply", json=json_data
-            )
-
-            if response.json()["err_code"] != 0:
-                if response.json()["err_code"] == 10003:
-                    logger.info(
-                        f"{self.address} | Already applied invite code: {ref_code}"
-                    )
-                    return True
-                raise Exception(response.text)
-            else:
+            self.api.apply_invite_code(ref_code)
+            logger.success(f"{self.address} | Applied invite code: {ref_code}")
+            return True
 
-                logger.success(f"{self.address} | Applied invite code: {ref_code}")
-                return True
+        except AlreadyAppliedError:
+            # nothing was done now, None counts as skipped rather than completed
+            logger.info(f"{self.address} | Already applied invite code: {ref_code}")
+            return None
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to apply invite code: {err}")
@@ -398,15 +440,11 @@ class Xterio:
 
     def send_chat_messages(self):
         try:
-            scene_response = self.client.get(
-                "https://api.xter.io/ai/v1/scene?lang="
-            )
+            scene = Scene(**cache.shared_cache.get_or_load("scene", self._get_scene))
 
-            scene = scene_response.json()['data']['list'][0]
+            describe = scene.describe
 
-            describe = scene['describe']
-
-            prologue = scene['prologue']
+            prologue = scene.prologue
 
             messages = [
                 {
@@ -419,11 +457,13 @@ class Xterio:
                 }
             ]
 
+            sent = 0
             for _ in range(3):
                 if self.config["settings"]["use_chatgpt"]:
-                    message = ask_chatgpt(
+                    message = ask_chatgpt_cached(
                         self.config["settings"]["chat_gpt_api_key"],
-                        messages=messages
+                        messages=messages,
+                        scene_key=f"{scene.id}|{describe}",
                     )
                 else:
                     message = random.choice(chat_messages.CHAT_MESSAGES)
@@ -444,39 +484,50 @@ class Xterio:
                         api_key=self.config["captcha"]["captcha_api_key"],
                     )
 
-                    for _ in range(self.config["captcha"]["solve_captcha_attempts"]):
-                        result = solver.solve_hcaptcha(sitekey, pageurl)
+                    attempts = self.config["captcha"]["solve_captcha_attempts"]
+                    breaker = get_breaker(CAPTCHA_ENDPOINT)
+                    for attempt in range(1, attempts + 1):
+                        breaker.wait(default_policy.max_delay * attempts)
+                        try:
+                            with limited(CAPTCHA), trace.span("solve_captcha", "captcha"):
+                                result = recorder.stubbed(
+                                    recorder.CAPTCHA_KEY,
+                                    lambda: solver.solve_hcaptcha(sitekey, pageurl),
+                                    secret=True,
+                                )
+                        except Exception:
+                            # a half-open breaker would otherwise wait for this probe forever
+                            breaker.record_failure()
+                            raise
                         if result:
+                            breaker.record_success()
                             logger.success(f"{self.address} | Captcha solved for chat")
                             break
                         else:
+                            breaker.record_failure()
                             logger.error(
                                 f"{self.address} | Failed to solve captcha for chat"
                             )
+                            if attempt < attempts:
+                                default_policy.sleep(attempt)
 
                     if not result:
                         raise Exception("failed to solve captcha for chat 3 times")
 
                     json_data["h-recaptcha-response"] = result.strip()
 
-                response = self.client.post(
-                    "https://api.xter.io/ai/v1/chat",
-                    json=json_data,
-                )
-
-                if "error" in response.text:
-                    logger.error(
-                        f"{self.address} | Failed to send chat message: {response.text}"
-                    )
+                try:
+                    answer = self.api.chat(json_data)
+                except ApiError as err:
+                    logger.error(f"{self.address} | Failed to send chat message: {err.message}")
                 else:
                     logger.success(f"{self.address} | Sent chat message: {message}")
                     self.is_captcha_solved_for_chat = True
+                    sent += 1
 
-                    try:
-                        last_line = [line for line in response.text.splitlines() if line.strip()][-1]
-
-                        answer = json.loads(last_line)['responses'][0]['chunk']
-
+                    if answer is None:
+                        logger.error(f"{self.address} | Failed to get answer from chat response")
+                    else:
                         logger.info(f'{self.address} | Received answer: {answer["content"]}')
 
                         messages.append(
@@ -487,25 +538,28 @@ class Xterio:
                         )
 
                         messages.append(answer)
-                    except:
-                        logger.error(f"{self.address} | Failed to get answer from response: {response.text}")
 
-                time.sleep(random.randint(3, 6))
+                trace.sleep(random.randint(3, 6), "pause_between_messages")
+
+            if not sent:
+                raise Exception("no chat message was accepted")
+            return True
 
         except Exception as err:
             traceback.print_exc()
             logger.error(f"{self.address} | Failed to send chat message: {err}")
             return False
 
+    def _get_scene(self) -> dict:
+        # cached as a plain dict, the disk store keeps JSON
+        scene = self.api.scene()
+        return {"id": scene.id, "describe": scene.describe, "prologue": scene.prologue}
+
     def collect_invite_code(self):
         try:
-            response = self.client.get("https://api.xter.io/ai/v1/user/invite/code")
-            if response.json()["err_code"] != 0:
-                raise Exception(response.text)
-            else:
-                code = response.json()["data"]["code"]
-                logger.success(f"{self.address} | Collected invite code: {code}")
-                return code
+            code = self.api.invite_code()
+            logger.success(f"{self.address} | Collected invite code: {code}")
+            return code
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to collect invite code: {err}")
@@ -514,7 +568,7 @@ class Xterio:
     def withdraw_from_binance(self):
         try:
             bnb_balance = self._check_bnb_balance()
-            if not bnb_balance:
+            if bnb_balance is None:
                 raise Exception("Unable to check the BNB balance")
 
             amount_to_withdraw = random.uniform(
@@ -547,91 +601,84 @@ class Xterio:
             return False
 
     def _check_bnb_balance(self):
-        for _ in range(5):
-            try:
-                balance_wei = self.bsc_w3.eth.get_balance(self.address)
-                return float(Web3.from_wei(balance_wei, "ether"))
-            except Exception as err:
-                logger.error(f"{self.address} | Failed to get BNB balance: {err}")
+        try:
+            balance_wei = self.bsc_w3.eth.get_balance(self.address)
+            return float(Web3.from_wei(balance_wei, "ether"))
+        except Exception as err:
+            logger.error(f"{self.address} | Failed to get BNB balance: {err}")
 
         raise Exception("Failed to get BNB balance")
 
-    def _get_tasks(self):
+    def _get_tasks(self) -> list[Task]:
         try:
-            response = self.client.get("https://api.xter.io/ai/v1/task")
-            if response.json()["err_code"] != 0:
-                raise Exception(response.text)
-            else:
-                return response.json()["data"]
-
             # 18: share ai mission
             # 20: telegram mission
+            return self.api.tasks()
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to get tasks: {err}")
             raise err
 
     def _get_challenge(self) -> str:
-        for _ in range(5):
-            try:
-                response = self.client.get(
-                    f"https://api.xter.io/account/v1/login/wallet/{self.address.upper()}",
-                )
-
-                res = response.json()
-
-                if res["err_code"] != 0:
-                    raise Exception(res)
-
-                else:
-                    return res["data"]["message"]
-
-            except Exception as err:
-                logger.error(f"{self.address} Failed to get challange: {err}")
-
-        return ""
+        try:
+            return self.api.challenge(self.address)
+        except Exception as err:
+            logger.error(f"{self.address} Failed to get challange: {err}")
+            raise
 
     def _get_signature(self):
         message = self._get_challenge()
-        encoded_msg = encode_defunct(text=message)
-        signed_msg = Web3().eth.account.sign_message(
-            encoded_msg, private_key=self.private_key
-        )
-        signature = signed_msg.signature.hex()
+        with trace.span("sign_message", "cpu"):
+            signature = self.signer.sign_message(message).hex()
 
         return signature
 
+    def _reauthenticate(self):
+        """Called by XterioApi when the token was rejected, signs in with a fresh one"""
+        logger.warning(f"{self.address} | Token rejected, signing in again")
+        self.token = ""
+        self.client.headers.pop("authorization", None)
+        ok, _ = self._sign_in()
+        if not ok:
+            raise Exception("unable to sign in again")
+
     def _sign_in(self) -> tuple[bool, bool]:
+        with trace.span("sign_in", "account"):
+            return self._sign_in_once()
+
+    def _sign_in_once(self) -> tuple[bool, bool]:
         try:
             signature = self._get_signature()
-            json_data = {
-                "address": self.address,
-                "type": "eth",
-                "sign": "0x" + signature,
-                "provider": "BYBIT",
-                "invite_code": "",
-            }
-            response = self.client.post(
-                "https://api.xter.io/account/v1/login/wallet", json=json_data
-            )
-            res = response.json()
+            login = self.api.login(self.address, "0x" + signature)
 
-            is_new = True if int(res["data"]["is_new"]) == 1 else False
-
-            if res["err_code"] != 0:
-                raise Exception(res)
-
-            else:
-                logger.success(f"{self.address} | Sign into Xterio account.")
-                self.client.headers.update({"authorization": res["data"]["id_token"]})
-                return True, is_new
+            logger.success(f"{self.address} | Sign into Xterio account.")
+            self.token = login.id_token
+            self.client.headers.update({"authorization": self.token})
+            return True, login.is_new
 
         except Exception as err:
             logger.error(f"{self.address} | Failed to Sign in Xterio account: {err}")
 
         return False, False
 
-    def bridge_eth(self):
+    def bridge_tx_state(self, tx_hash: str) -> str:
+        """State of an earlier bridge transaction on BSC: confirmed, reverted, pending or missing"""
+        bnb_w3 = self.bsc_w3
+        try:
+            receipt = bnb_w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            try:
+                bnb_w3.eth.get_transaction(tx_hash)
+            except TransactionNotFound:
+                return "missing"
+            return "pending"
+        return "confirmed" if receipt.status == 1 else "reverted"
+
+    def bridge_eth(self, tracker: DepositTracker | None = None, on_funded=None):
+        """
+        Without a tracker waits for the BSC receipt. With a tracker returns right after
+        broadcast and on_funded(ok) is called once the deposit lands on Xterio.
+        """
         try:
             # Get random amount between config values with random decimal places (8-18)
             amount = round(
@@ -642,7 +689,7 @@ class Xterio:
                 random.randint(8, 18),
             )
             amount_wei = Web3.to_wei(amount, "ether")
-            bnb_w3 = Web3(Web3.HTTPProvider(self.config["bridge_to_xterio"]["BNB_RPC"]))
+            bnb_w3 = self.bsc_w3
 
             contract_address = Web3.to_checksum_address(constants.CONTRACT_ADDRESS)
             contract = bnb_w3.eth.contract(
@@ -668,13 +715,39 @@ class Xterio:
             gas_estimate = bnb_w3.eth.estimate_gas(transaction)
             transaction["gas"] = int(gas_estimate * 1.15)  # Add 15% buffer
 
-            signed_transaction = bnb_w3.eth.account.sign_transaction(
-                transaction, private_key=self.private_key
+            if tracker:
+                xterio_balance = self.eth_w3.eth.get_balance(self.address)
+
+            with trace.span("sign_transaction", "cpu"):
+                signed_transaction = self.signer.sign_transaction(transaction)
+            tx_hash = send_raw_transaction(
+                bnb_w3, signed_transaction.raw_transaction
             )
-            tx_hash = bnb_w3.eth.send_raw_transaction(
-                signed_transaction.raw_transaction
+            self.bridge_tx = "0x" + tx_hash.hex()
+
+            if tracker:
+                events.emit(
+                    "bridge",
+                    "sent",
+                    chain="bsc",
+                    address=self.address,
+                    tx_hash="0x" + tx_hash.hex(),
+                )
+                tracker.track(self.address, xterio_balance, on_funded, "0x" + tx_hash.hex())
+                logger.success(
+                    f"{self.address} | Sent bridge of {amount} BNB https://bscscan.com/tx/0x{tx_hash.hex()}"
+                )
+                return True
+
+            with trace.span("wait_for_receipt", "wait", chain="bsc"):
+                receipt = bnb_w3.eth.wait_for_transaction_receipt(tx_hash)
+            events.emit(
+                "bridge",
+                "ok" if receipt.status == 1 else "reverted",
+                chain="bsc",
+                address=self.address,
+                tx_hash="0x" + tx_hash.hex(),
             )
-            receipt = bnb_w3.eth.wait_for_transaction_receipt(tx_hash)
 
             if receipt.status == 1:
                 logger.success(
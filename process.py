@@ -1,14 +1,25 @@
+import datetime
+import os
 import queue
 import random
+import signal
+import socket
 import time
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import requests
 from loguru import logger
+from web3 import Web3
 import threading
 
 import extra
 import model
+from extra import events, failures, trace
+
+# stage that a task fails at after a successful sign in
+TASK_STAGES = {1: "tasks", 2: "withdraw", 3: "bridge", 4: "invite_code"}
+PIPELINE_STAGES = ("withdraw", "bridge", "tasks")
 
 
 def start():
@@ -21,23 +32,65 @@ def start():
             "[1] Xterio tasks\n"
             "[2] Withdraw from Binance\n"
             "[3] Bridge to Xterio from BNB\n"
-            "[4] Collect invite codes\n\n>> "
+            "[4] Collect invite codes\n"
+            "[5] Pipeline: withdraw -> bridge -> Xterio tasks\n"
+            "[6] Rerun failed accounts\n\n>> "
         ).strip()
     )
 
-    def launch_wrapper(index, proxy, private_key):
-        if index <= threads:
-            delay = random.uniform(1, threads)
-            logger.info(f"Thread {index} starting with delay {delay:.1f}s")
-            time.sleep(delay)
+    threads = 0
+    if task != 5:
+        threads = int(input("\nHow many threads do you want: ").strip())
+
+    if task == 6:
+        rerun_failed(threads)
+        return
+
+    config = load_config()
+    accounts = load_accounts(config)
+    if accounts is None:
+        return
+
+    lock = threading.Lock()
+
+    logger.info("Starting...")
+    if task == 5:
+        run_pipeline(lock, accounts, config)
+    else:
+        run_accounts(lock, accounts, config, task, threads)
+
+    if model.gpt.answer_cache:
+        model.gpt.answer_cache.log_stats()
 
-        account_flow(lock, index, proxy, private_key, config, task)
+    shutdown()
+
+    logger.success("Saved accounts and private keys to a file.")
 
-    threads = int(input("\nHow many threads do you want: ").strip())
 
+def load_config() -> dict:
     config = extra.read_config()
     config["abi"] = extra.read_abi("extra/abi.json")
-
+    model.retry.configure(config)
+    model.rpc.configure(config)
+    model.gpt.configure(config)
+    model.cache.configure(config)
+    model.limiter.configure(config)
+    events.configure(config)
+    trace.configure(config)
+    extra.recorder.configure(config)
+    extra.memory.configure(config)
+    return config
+
+
+def shutdown():
+    """Flush background writers before exit"""
+    extra.memory.close()
+    events.close()
+    trace.close()
+    extra.recorder.close()
+
+
+def load_accounts(config: dict, interactive: bool = True) -> list | None:
     proxies = extra.read_txt_file("proxies", "data/proxies.txt")
     private_keys = extra.read_txt_file("private keys", "data/private_keys.txt")
     indexes = [i + 1 for i in range(len(private_keys))]
@@ -49,58 +102,229 @@ def start():
 
     use_proxy = True
     if len(proxies) == 0:
-        if not extra.no_proxies():
-            return
+        if not interactive:
+            logger.warning("No proxies were detected, continuing without proxies")
+            use_proxy = False
+        elif not extra.no_proxies():
+            return None
         else:
             use_proxy = False
 
-    lock = threading.Lock()
-
     if not use_proxy:
         proxies = ["" for _ in range(len(private_keys))]
     elif len(proxies) < len(private_keys):
         proxies = [proxies[i % len(proxies)] for i in range(len(private_keys))]
 
-    logger.info("Starting...")
+    return [
+        model.account.AccountRecord(index, private_key, proxy)
+        for index, proxy, private_key in zip(indexes, proxies, private_keys)
+    ]
+
+
+def run_daemon(threads: int | None = None, spread_hours: float | None = None):
+    """
+    Headless mode for daily missions. Runs forever, every account is processed when
+    its slot of the UTC day comes; clients, tokens and caches stay warm between days.
+    """
+    config = load_config()
+    settings = config.get("daemon", {})
+    threads = threads or settings.get("threads", 5)
+    spread_hours = spread_hours or settings.get("spread_hours", 24)
+    retry_delay = datetime.timedelta(minutes=settings.get("retry_delay_minutes", 15))
+
+    accounts = load_accounts(config, interactive=False)
+    scheduler = model.scheduler.DueScheduler(spread_hours)
+    for account in accounts:
+        scheduler.push(account, scheduler.first_due(account))
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    slots = threading.Semaphore(threads)
+
+    def run(account: model.account.AccountRecord):
+        try:
+            ok = account_flow(lock, account, config, 1)
+            now = datetime.datetime.now(datetime.timezone.utc)
+            if ok:
+                due = scheduler.next_due(account, now)
+            else:
+                # the saved token may have expired, sign in again on retry
+                account.token = ""
+                due = now + retry_delay
+            logger.info(f"{account.index} | Next run at {due:%Y-%m-%d %H:%M} UTC")
+            scheduler.push(account, due)
+        finally:
+            slots.release()
+
+    logger.info(f"Daemon started: {len(accounts)} accounts, {threads} threads, spread over {spread_hours}h")
     with ThreadPoolExecutor(max_workers=threads) as executor:
-        executor.map(launch_wrapper, indexes, proxies, private_keys)
+        try:
+            while True:
+                slots.acquire()
+                account = scheduler.pop_due(stop)
+                if account is None:
+                    break
+                executor.submit(run, account)
+        except KeyboardInterrupt:
+            logger.warning("Stopping daemon, waiting for running accounts...")
+            stop.set()
+
+    shutdown()
+
+
+@contextmanager
+def drain_on_signals(stop: threading.Event):
+    """First SIGINT/SIGTERM sets stop and lets running accounts finish, the second one aborts"""
+
+    def handler(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        stop.set()
+        logger.warning(
+            "Stopping: running accounts finish their current step, the rest are saved "
+            "for `python main.py rerun`. Press Ctrl+C again to abort"
+        )
 
-    logger.success("Saved accounts and private keys to a file.")
+    if threading.current_thread() is not threading.main_thread():
+        # signal handlers can only be installed by the main thread
+        yield
+        return
+
+    previous = {sig: signal.signal(sig, handler) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        yield
+    finally:
+        for sig, previous_handler in previous.items():
+            signal.signal(sig, previous_handler)
+
+
+def run_accounts(
+    lock: threading.Lock,
+    accounts: list,
+    config: dict,
+    task: int,
+    threads: int,
+    stagger: bool = True,
+) -> dict[str, int]:
+    """
+    Run account_flow for every account with at most 2 * threads accounts queued at a
+    time. Results are collected as accounts finish. On interrupt nothing new is started
+    and accounts that never ran go to the failure index, so a rerun picks them up.
+    """
+    stop = threading.Event()
+    slots = threading.BoundedSemaphore(threads * 2)
+    prewarmer = model.prewarm.Prewarmer(config)
+
+    def run():
+        if stop.is_set():
+            return
+        # a worker runs the account it warmed itself, see model.prewarm
+        account, xterio_instance, warmed = prewarmer.take()
+        try:
+            if stagger and account.index <= threads:
+                delay = random.uniform(1, threads)
+                logger.info(f"Thread {account.index} starting with delay {delay:.1f}s")
+                events.bind(account=account.index)
+                idle_pause(delay, "startup_stagger", stop, None if warmed else xterio_instance.prewarm)
+                if stop.is_set():
+                    xterio_instance.release()
+                    return
+
+            account_flow(
+                lock,
+                account,
+                config,
+                task,
+                stop,
+                xterio_instance,
+                prewarmer.warm_next,
+            )
+        except Exception as error:
+            account.state = "failed"
+            logger.opt(exception=error).error(f"{account.index} | Unexpected error in account flow: {error}")
+            failures.record_failure(account, task, "unexpected", error)
+
+    with drain_on_signals(stop), ThreadPoolExecutor(max_workers=threads) as executor:
+        for account in accounts:
+            while not slots.acquire(timeout=0.5):
+                if stop.is_set():
+                    break
+            if stop.is_set():
+                break
+            prewarmer.queue(account)
+            executor.submit(run).add_done_callback(lambda future: slots.release())
+
+    prewarmer.close()
+
+    counts = {"completed": 0, "failed": 0, "interrupted": 0, "not_started": 0}
+    for account in accounts:
+        if account.state == "done":
+            counts["completed"] += 1
+        elif account.state in ("failed", "interrupted"):
+            counts[account.state] += 1
+        else:
+            counts["not_started"] += 1
+            if stop.is_set():
+                failures.record_failure(account, task, "not_started", model.xterio.StopRequested("run was stopped"))
+
+    logger.info(
+        f"Accounts completed: {counts['completed']}, failed: {counts['failed']}, "
+        f"interrupted: {counts['interrupted']}, not started: {counts['not_started']}"
+    )
+    return counts
 
 
 def account_flow(
     lock: threading.Lock,
-    account_index: int,
-    proxy: str,
-    private_key: str,
+    account: model.account.AccountRecord,
     config: dict,
     task: int,
+    stop: threading.Event | None = None,
+    xterio_instance: model.xterio.Xterio | None = None,
+    on_idle=None,
 ):
-    try:
-        xterio_instance = model.xterio.Xterio(private_key, proxy, config)
+    """
+    xterio_instance is a prewarmed instance of the account, on_idle is called during
+    the pause after the account to prepare the next one
+    """
+    account_index, proxy, private_key = account.index, account.proxy, account.private_key
+    xterio_instance = xterio_instance or model.xterio.Xterio.from_record(account, config)
+    xterio_instance.stop = stop
+    account.state = "running"
+    events.bind(account=account_index)
+    started = time.monotonic()
+    stage = "init"
 
-        ok = wrapper(xterio_instance.init_instance, 1)
+    try:
+        ok = run_stage("init", xterio_instance.init_instance)
 
         if not ok:
             raise Exception("unable to init xterio instance")
 
+        account.address = xterio_instance.address
+        account.token = xterio_instance.token
+        events.bind(account=account_index, address=account.address)
+
+        stage = TASK_STAGES[task]
         if task == 1:
-            ok = wrapper(xterio_instance.complete_all_tasks, 1)
+            ok = run_stage("tasks", xterio_instance.complete_all_tasks)
             if not ok:
                 raise Exception("unable to complete all tasks")
 
         elif task == 2:
-            ok = wrapper(xterio_instance.withdraw_from_binance, 1)
+            ok = run_stage("withdraw", xterio_instance.withdraw_from_binance)
             if not ok:
                 raise Exception("unable to withdraw from binance")
 
         elif task == 3:
-            ok = wrapper(xterio_instance.bridge_eth, 1)
+            ok = run_stage("bridge", xterio_instance.bridge_eth)
             if not ok:
                 raise Exception("unable to bridge to xterio")
 
         elif task == 4:
-            invite_code = xterio_instance.collect_invite_code()
+            with events.timed("invite_code") as event:
+                invite_code = xterio_instance.collect_invite_code()
+                event.outcome = "ok" if invite_code else "failed"
             if invite_code:
                 with lock:
                     with open("data/invite_codes.txt", "a") as f:
@@ -110,22 +334,440 @@ def account_flow(
             with open("data/success_data.txt", "a") as f:
                 f.write(f"{private_key}:{proxy}\n")
 
-        time.sleep(
+        idle_pause(
             random.randint(
                 config["settings"]["pause_between_accounts"][0],
                 config["settings"]["pause_between_accounts"][1],
-            )
+            ),
+            "pause_between_accounts",
+            stop,
+            on_idle,
         )
+        account.state = "done"
+        events.emit("account", "ok", latency=time.monotonic() - started)
         logger.success(f"{account_index} | Account flow completed successfully")
+        failures.record_success(account, task)
+        return True
+
+    except model.xterio.StopRequested as err:
+        account.state = "interrupted"
+        events.emit("account", "interrupted", latency=time.monotonic() - started)
+        logger.warning(f"{account_index} | Account flow stopped at {stage}, saved for rerun")
+        failures.record_failure(account, task, stage, err)
+        return False
 
     except Exception as err:
+        account.state = "failed"
+        events.emit("account", "failed", latency=time.monotonic() - started, error=str(err))
         logger.error(f"{account_index} | Account flow failed: {err}")
         with lock:
             report_failed_key(private_key, proxy)
+        failures.record_failure(account, task, stage, err)
+        return False
+
+    finally:
+        # keep the token signed in again during the run for the next daemon day
+        if xterio_instance.token:
+            account.token = xterio_instance.token
+        xterio_instance.release()
+        extra.memory.account_finished(xterio_instance)
+        trace.record("account_flow", "account", started, state=account.state)
+
+
+def idle_pause(seconds: float, reason: str, stop: threading.Event | None = None, on_idle=None):
+    """Pause for `seconds` in total, doing on_idle() first inside that time"""
+    deadline = time.monotonic() + seconds
+    if on_idle and not (stop and stop.is_set()):
+        try:
+            on_idle()
+        except Exception as err:
+            logger.debug(f"Idle work failed: {err}")
+    trace.sleep(max(0.0, deadline - time.monotonic()), reason, stop)
+
+
+def run_pipeline(lock: threading.Lock, accounts: list, config: dict, resume_from: dict | None = None):
+    """resume_from maps account index to the stage it should start from"""
+    settings = config.get("pipeline", {})
+    resume_from = resume_from or {}
+
+    def ensure_signed_in(item: model.pipeline.PipelineItem) -> bool:
+        xterio_instance = item.xterio
+        if xterio_instance.client is not None:
+            return True
+        if not wrapper(xterio_instance.init_instance, 1):
+            return False
+
+        item.account.address = xterio_instance.address
+        item.account.token = xterio_instance.token
+        return True
+
+    def withdraw_stage(item: model.pipeline.PipelineItem) -> bool:
+        xterio_instance = item.xterio
+        if not ensure_signed_in(item):
+            return False
+
+        balance_before = xterio_instance.bsc_w3.eth.get_balance(item.account.address)
+        if not wrapper(xterio_instance.withdraw_from_binance, 1):
+            return False
+        if balance_before >= Web3.to_wei(config["binance"]["min_bnb_balance"], "ether"):
+            return True
+
+        def on_arrived(ok: bool):
+            # called by the withdrawal tracker thread, the withdraw thread moved on
+            pipeline.resume(item, "withdraw", ok)
+
+        withdrawals.track(item.account.address, balance_before, on_arrived)
+        return model.pipeline.DEFERRED
+
+    def bridge_stage(item: model.pipeline.PipelineItem):
+        def on_funded(ok: bool):
+            # called by the deposit tracker thread, so the account is passed explicitly
+            events.emit(
+                "bridge",
+                "ok" if ok else "failed",
+                chain="xterio",
+                account=item.account.index,
+                address=item.account.address,
+            )
+            if ok:
+                item.account.state = "funded"
+            pipeline.resume(item, "bridge", ok)
+
+        if not ensure_signed_in(item):
+            return False
+        if item.resume_from == "bridge":
+            previous = resume_bridge(item, on_funded)
+            if previous is not None:
+                return previous
+        ok = wrapper(item.xterio.bridge_eth, 1, tracker, on_funded)
+        item.account.bridge_tx = item.xterio.bridge_tx
+        if not ok:
+            return False
+        return model.pipeline.DEFERRED
+
+    def resume_bridge(item: model.pipeline.PipelineItem, on_funded):
+        """
+        A rerun from the bridge stage may follow a bridge that went through but was not
+        seen in time. Skip it when Xterio is funded, wait for a recorded bridge that
+        succeeded or is still pending, None to bridge again.
+        """
+        account, xterio_instance = item.account, item.xterio
+        balance = xterio_instance.eth_w3.eth.get_balance(account.address)
+        if balance >= Web3.to_wei(config["bridge_to_xterio"]["AMOUNT"][0], "ether"):
+            logger.info(f"{account.index} | Xterio already funded, not bridging again")
+            account.state = "funded"
+            return True
+        if not account.bridge_tx:
+            return None
+
+        state = xterio_instance.bridge_tx_state(account.bridge_tx)
+        logger.info(f"{account.index} | Previous bridge {account.bridge_tx} is {state}")
+        if state in ("confirmed", "pending"):
+            tracker.track(account.address, balance, on_funded, account.bridge_tx)
+            return model.pipeline.DEFERRED
+        return None
+
+    def tasks_stage(item: model.pipeline.PipelineItem) -> bool:
+        if not ensure_signed_in(item):
+            return False
+        return wrapper(item.xterio.complete_all_tasks, 1)
+
+    def on_finished(item: model.pipeline.PipelineItem, ok: bool):
+        account = item.account
+        try:
+            item.xterio.release()
+        except Exception as err:
+            logger.error(f"{account.index} | Failed to release clients: {err}")
+        extra.memory.account_finished(item.xterio)
+        if item.interrupted or isinstance(item.error, model.xterio.StopRequested):
+            account.state = "interrupted"
+            events.emit("account", "interrupted", account=account.index, failed_stage=item.failed_stage)
+            logger.warning(f"{account.index} | Account pipeline stopped at {item.failed_stage}, saved for rerun")
+            failures.record_failure(
+                account, 5, item.failed_stage, item.error or model.xterio.StopRequested("run was stopped")
+            )
+            return
+        events.emit(
+            "account",
+            "ok" if ok else "failed",
+            account=account.index,
+            address=account.address,
+            failed_stage=item.failed_stage,
+        )
+        if ok:
+            account.state = "done"
+            logger.success(f"{account.index} | Account pipeline completed successfully")
+            with lock:
+                with open("data/success_data.txt", "a") as f:
+                    f.write(f"{account.private_key}:{account.proxy}\n")
+            failures.record_success(account, 5)
+        else:
+            account.state = "failed"
+            logger.error(f"{account.index} | Account pipeline failed at {item.failed_stage}")
+            with lock:
+                report_failed_key(account.private_key, account.proxy)
+            failures.record_failure(
+                account,
+                5,
+                item.failed_stage,
+                item.error or Exception(f"{item.failed_stage} stage returned failure"),
+            )
+
+    stages = [
+        model.pipeline.Stage("withdraw", withdraw_stage, settings.get("withdraw_threads", 3)),
+        model.pipeline.Stage("bridge", bridge_stage, settings.get("bridge_threads", 5)),
+        model.pipeline.Stage("tasks", tasks_stage, settings.get("tasks_threads", 10)),
+    ]
+    stop = threading.Event()
+    items = [
+        model.pipeline.PipelineItem(
+            account,
+            model.xterio.Xterio.from_record(account, config),
+            resume_from=resume_from.get(account.index, ""),
+        )
+        for account in accounts
+    ]
+    for item in items:
+        item.xterio.stop = stop
+    tracker = model.bridge_tracker.DepositTracker(
+        model.rpc.create_web3("xterio", config["bridge_to_xterio"]["XTERIO_RPC"]),
+        poll_interval=settings.get("deposit_poll_interval", 10),
+        timeout=settings.get("deposit_timeout", 1800),
+        source_w3=model.rpc.create_web3("bsc", config["bridge_to_xterio"]["BNB_RPC"]),
+    )
+    withdrawals = model.bridge_tracker.DepositTracker(
+        model.rpc.create_web3("bsc", config["bridge_to_xterio"]["BNB_RPC"]),
+        poll_interval=settings.get("deposit_poll_interval", 10),
+        timeout=settings.get("withdraw_timeout", 600),
+        label="Binance withdrawal",
+    )
+    pipeline = model.pipeline.Pipeline(stages, on_finished, stop)
+    with drain_on_signals(stop):
+        pipeline.run(items)
+
+
+def rerun_failed(threads: int | None = None):
+    """Replay only accounts whose last run of a task failed, starting from the failed stage"""
+    config = load_config()
+    records = failures.unresolved_failures()
+    if not records:
+        logger.info("No failed accounts to rerun")
+        return
+
+    threads = threads or config.get("daemon", {}).get("threads", 5)
+    lock = threading.Lock()
+    by_task: dict[int, list] = {}
+    for record in records:
+        by_task.setdefault(record["task"], []).append(record)
+
+    for task, task_records in sorted(by_task.items()):
+        accounts = [
+            model.account.AccountRecord(
+                record["index"],
+                record["private_key"],
+                record.get("proxy", ""),
+                address=record.get("address", ""),
+                bridge_tx=record.get("bridge_tx", ""),
+            )
+            for record in task_records
+        ]
+        logger.info(f"Rerunning {len(accounts)} failed accounts of task {task}")
+
+        if task == 5:
+            resume_from = {
+                record["index"]: record["stage"]
+                for record in task_records
+                if record["stage"] in PIPELINE_STAGES
+            }
+            run_pipeline(lock, accounts, config, resume_from)
+        else:
+            run_accounts(lock, accounts, config, task, threads, stagger=False)
+
+    shutdown()
+
+
+def open_work_table(config: dict, coordinator: str = ""):
+    """Work table of a multi-host run: a coordinator URL or a SQLite file path"""
+    settings = config.get("coordinator", {})
+    source = coordinator or settings.get("db", "data/work.sqlite")
+    if source.startswith(("http://", "https://")):
+        return model.coordinator.RemoteWorkTable(source, settings.get("token", ""))
+    return model.coordinator.WorkTable(source, settings.get("lease_seconds", 300))
+
+
+def run_coordinator(host: str | None = None, port: int | None = None):
+    """Serve the work table of data/private_keys.txt to workers on other hosts"""
+    config = extra.read_config()
+    settings = config.get("coordinator", {})
+    table = model.coordinator.WorkTable(settings.get("db", "data/work.sqlite"), settings.get("lease_seconds", 300))
+    try:
+        server = model.coordinator.CoordinatorServer(
+            table,
+            host or settings.get("host", "127.0.0.1"),
+            port or settings.get("port", 8765),
+            settings.get("token", ""),
+        )
+    except ValueError as err:
+        logger.error(f"Coordinator not started: {err}")
+        return
+
+    added = table.seed(load_accounts(config, interactive=False))
+    logger.info(f"Work table {table.path}: {added} new accounts, {table.stats()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+    logger.info(f"Coordinator stopped: {table.stats()}")
+
+
+def run_worker(coordinator: str = "", threads: int | None = None, task: int = 1):
+    """
+    Lease accounts from a shared work table until none are pending or leased. Leases
+    are renewed by a heartbeat thread; when this worker dies they expire and another
+    worker picks the accounts up.
+    """
+    config = load_config()
+    settings = config.get("coordinator", {})
+    threads = threads or settings.get("threads", 5)
+    lease_seconds = settings.get("lease_seconds", 300)
+    try:
+        table = open_work_table(config, coordinator)
+    except ValueError as err:
+        logger.error(f"Worker not started: {err}")
+        return
+    if isinstance(table, model.coordinator.WorkTable):
+        table.seed(load_accounts(config, interactive=False))
+
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    lock = threading.Lock()
+    stop = threading.Event()
+    # leases are renewed until the accounts still running after a stop have drained
+    drained = threading.Event()
+    held: dict[str, model.account.AccountRecord] = {}
+    held_lock = threading.Lock()
+
+    def heartbeat():
+        while not drained.wait(lease_seconds / 3):
+            with held_lock:
+                ids = list(held)
+            try:
+                if ids and table.heartbeat(worker, ids) < len(ids):
+                    logger.warning(f"Worker {worker} lost some of its leases")
+            except Exception as err:
+                logger.error(f"Worker {worker} heartbeat failed: {err}")
+
+    def run(account: model.account.AccountRecord, item: str):
+        ok = None
+        try:
+            if not stop.is_set():
+                ok = account_flow(lock, account, config, task, stop)
+                if account.state == "interrupted":
+                    ok = None
+        except Exception as err:
+            logger.opt(exception=err).error(f"{account.index} | Unexpected error in account flow: {err}")
+            ok = False
+        finally:
+            try:
+                if not table.complete(worker, item, ok, account.address, account.state):
+                    logger.warning(f"{account.index} | Lease expired before the result was reported")
+            except Exception as err:
+                logger.error(f"{account.index} | Failed to report result to coordinator: {err}")
+            with held_lock:
+                held.pop(item, None)
+
+    threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True).start()
+    logger.info(f"Worker {worker} started with {threads} threads")
+
+    with drain_on_signals(stop), ThreadPoolExecutor(max_workers=threads) as executor:
+        while not stop.is_set():
+            with held_lock:
+                free = threads - len(held)
+            try:
+                accounts = table.lease(worker, min(free, settings.get("batch_size", 5))) if free > 0 else []
+                if not accounts and free == threads:
+                    counts = table.stats()
+                    if counts["pending"] + counts["leased"] == 0:
+                        break
+            except Exception as err:
+                logger.error(f"Worker {worker} failed to lease accounts: {err}")
+                accounts = []
+
+            for account in accounts:
+                item = model.coordinator.account_id(account.private_key)
+                with held_lock:
+                    held[item] = account
+                executor.submit(run, account, item)
+
+            stop.wait(1 if accounts else 5)
+
+    drained.set()
+    logger.info(f"Worker {worker} finished, work table: {table.stats()}")
+    shutdown()
+
+
+def run_audit(path: str, batch_size: int = 200, check_api: bool = True, threads: int = 10):
+    """Check the transactions of a run event log on chain and against api.xter.io"""
+    config = load_config()
+    rpc = config["bridge_to_xterio"]
+    web3_by_chain = {
+        "xterio": model.rpc.create_web3("xterio", rpc["XTERIO_RPC"]),
+        "bsc": model.rpc.create_web3("bsc", rpc["BNB_RPC"]),
+    }
+
+    def load_reported(addresses: list[str]) -> dict[str, dict[int, set[str]]]:
+        wanted = set(addresses)
+        accounts = {}
+        for account in load_accounts(config, interactive=False):
+            private_key = account.private_key
+            if len(private_key.split()) > 1:
+                private_key = extra.mnemonic_to_private_key(private_key)
+            address = model.signer.Signer(private_key).address
+            if address in wanted:
+                accounts[address] = account
+
+        missing = len(wanted) - len(accounts)
+        if missing:
+            logger.warning(f"{missing} audited addresses are not in data/private_keys.txt, their API check is skipped")
+
+        def load(address: str):
+            account = accounts[address]
+            xterio_instance = model.xterio.Xterio.from_record(account, config)
+            try:
+                if not xterio_instance.init_instance():
+                    return address, None
+                return address, {
+                    task.id: {user_task.tx_hash.lower() for user_task in task.user_task if user_task.tx_hash}
+                    for task in xterio_instance.api.tasks()
+                }
+            except Exception as err:
+                logger.error(f"{account.index} | Failed to load tasks for audit: {err}")
+                return address, None
+            finally:
+                xterio_instance.release()
+
+        reported = {}
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for address, tasks in executor.map(load, accounts):
+                if tasks is not None:
+                    reported[address] = tasks
+        return reported
+
+    transactions, mismatches = model.audit.audit(
+        path, web3_by_chain, load_reported if check_api else None, batch_size
+    )
+    model.audit.print_report(transactions, mismatches)
+    shutdown()
+
+
+def run_stage(name: str, function, *args) -> bool:
+    with events.timed(f"stage:{name}") as event:
+        ok = wrapper(function, 1, *args)
+        event.outcome = "ok" if ok else "failed"
+    return ok
 
 
 def wrapper(function, attempts: int, *args, **kwargs):
-    for _ in range(attempts):
+    for attempt in range(1, attempts + 1):
         result = function(*args, **kwargs)
         if isinstance(result, tuple) and result and isinstance(result[0], bool):
             if result[0]:
@@ -134,6 +776,9 @@ def wrapper(function, attempts: int, *args, **kwargs):
             if result:
                 return True
 
+        if attempt < attempts:
+            model.retry.default_policy.sleep(attempt)
+
     return result
 
 
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from model.api import AlreadyAppliedError, ApiError, AuthError, Task, UserTask, XterioApi
+
+
+class Response:
+    def __init__(self, status_code: int, body):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+        self.content = self.text.encode()
+
+
+def api_with(responses: list[Response], reauthenticate=None):
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append((method, url))
+        return responses.pop(0)
+
+    return XterioApi(request, reauthenticate), sent
+
+
+def test_error_codes_become_typed_errors():
+    api, _ = api_with([Response(200, {"err_code": 10003, "err_msg": "already applied"})])
+    with pytest.raises(AlreadyAppliedError):
+        api.apply_invite_code("CODE")
+
+    api, _ = api_with([Response(200, {"err_code": 500, "err_msg": "oops"})])
+    with pytest.raises(ApiError) as error:
+        api.invite_code()
+    assert error.value.err_code == 500
+    assert error.value.path == "/ai/v1/user/invite/code"
+
+
+def test_tasks_are_decoded_into_models():
+    user_task = {"UpdatedAt": "2026-01-01", "tx_hash": "0x1"}
+    api, sent = api_with([Response(200, {"err_code": 0, "data": {"list": [{"ID": 3, "user_task": [user_task]}]}})])
+
+    assert api.tasks() == [Task(3, [UserTask("2026-01-01", "0x1")])]
+    assert sent == [("GET", "https://api.xter.io/ai/v1/task")]
+
+
+@pytest.mark.parametrize(
+    "rejected",
+    [Response(401, "Unauthorized"), Response(200, {"err_code": 401, "err_msg": "Token expired"})],
+)
+def test_rejected_token_signs_in_again_once(rejected):
+    signed_in = []
+    api, sent = api_with(
+        [rejected, Response(200, {"err_code": 0, "data": {"code": "ABC"}})], lambda: signed_in.append(True)
+    )
+
+    assert api.invite_code() == "ABC"
+    assert signed_in == [True]
+    assert len(sent) == 2
+
+
+def test_second_rejection_is_raised():
+    api, _ = api_with([Response(401, "Unauthorized"), Response(401, "Unauthorized")], lambda: None)
+    with pytest.raises(AuthError):
+        api.invite_code()
+
+
+def test_login_is_not_retried_with_a_new_sign_in():
+    signed_in = []
+    api, sent = api_with([Response(401, "Unauthorized")], lambda: signed_in.append(True))
+    with pytest.raises(AuthError):
+        api.challenge("0xabc")
+    assert signed_in == []
+    assert len(sent) == 1
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+
+from model import audit
+from model.audit import RecordedTx, check_receipts, fetch_receipts
+
+OK = {"status": "0x1", "blockNumber": "0x10"}
+REVERTED = {"status": "0x0", "blockNumber": "0x11"}
+
+
+class FlakyProvider:
+    """Answers receipt batches, hashes in `flaky` fail their first lookup, `broken` ones always"""
+
+    def __init__(self, receipts: dict, flaky=(), broken=()):
+        self.receipts = receipts
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+        self.batches = []
+
+    def make_batch_request(self, requests):
+        hashes = [params[0] for _, params in requests]
+        self.batches.append(hashes)
+        responses = []
+        for request_id, tx_hash in enumerate(hashes):
+            if tx_hash in self.broken or tx_hash in self.flaky:
+                self.flaky.discard(tx_hash)
+                responses.append({"id": request_id, "error": {"code": -32005, "message": "limit exceeded"}})
+            else:
+                responses.append({"id": request_id, "result": self.receipts.get(tx_hash)})
+        return responses
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(audit.default_policy, "sleep", lambda attempt: None)
+
+
+def tx(tx_hash: str) -> RecordedTx:
+    return RecordedTx("claim_mission", "xterio", tx_hash, "0xabc", "ok")
+
+
+def test_errored_lookups_are_retried():
+    provider = FlakyProvider({"0x1": OK, "0x2": OK}, flaky={"0x2"})
+
+    receipts, errors = fetch_receipts(SimpleNamespace(provider=provider), ["0x1", "0x2"])
+
+    assert receipts == {"0x1": OK, "0x2": OK}
+    assert errors == {}
+    assert provider.batches == [["0x1", "0x2"], ["0x2"]]
+
+
+def test_lookups_that_keep_failing_are_unknown_not_missing():
+    provider = FlakyProvider({"0x1": REVERTED}, broken={"0x2"})
+    transactions = [tx("0x1"), tx("0x2"), tx("0x3")]
+
+    receipts, errors = fetch_receipts(SimpleNamespace(provider=provider), ["0x1", "0x2", "0x3"], attempts=2)
+    problems = {mismatch.tx.tx_hash: mismatch.problem for mismatch in check_receipts(transactions, receipts, errors)}
+
+    assert problems == {"0x1": "reverted", "0x2": "unknown", "0x3": "missing_receipt"}
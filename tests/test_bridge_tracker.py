@@ -0,0 +1,115 @@
+import pytest
+
+from model.bridge_tracker import DepositTracker
+
+TX = "0x" + "ab" * 32
+
+
+class Batch:
+    def __init__(self, w3):
+        self.w3 = w3
+        self.addresses = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, address):
+        self.addresses.append(address)
+
+    def execute(self):
+        if self.w3.down:
+            raise ConnectionError("rpc down")
+        return [self.w3.balances.get(address, 0) for address in self.addresses]
+
+
+class FakeWeb3:
+    """Balances for batched eth_getBalance, receipts and transactions for the source chain"""
+
+    def __init__(self):
+        self.balances = {}
+        self.receipts = {}
+        self.transactions = {}
+        self.down = False
+        self.eth = self
+        self.provider = self
+
+    def get_balance(self, address):
+        return address
+
+    def batch_requests(self):
+        return Batch(self)
+
+    def make_batch_request(self, requests):
+        if self.down:
+            raise ConnectionError("rpc down")
+        responses = []
+        for method, (tx_hash,) in requests:
+            source = self.receipts if method == "eth_getTransactionReceipt" else self.transactions
+            responses.append({"jsonrpc": "2.0", "result": source.get(tx_hash)})
+        return responses
+
+
+@pytest.fixture
+def chains():
+    return FakeWeb3(), FakeWeb3()
+
+
+def track(chains):
+    destination, source = chains
+    # polled by the tests, the background thread never gets to it
+    tracker = DepositTracker(destination, poll_interval=3600, source_w3=source)
+    finished = []
+    tracker.track("0xabc", 100, finished.append, TX)
+    return tracker, finished
+
+
+def test_confirmed_bridge_finishes_when_the_deposit_lands(chains):
+    destination, source = chains
+    tracker, finished = track(chains)
+    source.receipts[TX] = {"status": "0x1"}
+
+    tracker.poll()
+    assert finished == [] and tracker._deposits["0xabc"].source_confirmed
+
+    destination.balances["0xabc"] = 150
+    tracker.poll()
+    assert finished == [True]
+    assert tracker.pending() == 0
+
+
+def test_reverted_bridge_fails_right_away(chains):
+    _, source = chains
+    tracker, finished = track(chains)
+    source.receipts[TX] = {"status": "0x0"}
+
+    tracker.poll()
+    assert finished == [False]
+
+
+def test_dropped_bridge_fails_after_missing_polls(chains):
+    _, source = chains
+    tracker, finished = track(chains)
+    source.transactions[TX] = {"hash": TX}
+    tracker.poll()
+    del source.transactions[TX]
+
+    for _ in range(DepositTracker.MAX_MISSING_POLLS - 1):
+        tracker.poll()
+    assert finished == []
+    tracker.poll()
+    assert finished == [False]
+
+
+def test_deadline_fires_while_the_rpc_is_down(chains):
+    destination, source = chains
+    tracker, finished = track(chains)
+    tracker._deposits["0xabc"].deadline = 0
+    destination.down = source.down = True
+
+    with pytest.raises(ConnectionError):
+        tracker.poll()
+    assert finished == [False]
+    assert tracker.pending() == 0
@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from model import gpt
+from model.cache import SharedCache
+from model.gpt import ChatAnswerCache
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_concurrent_misses_of_an_answer_pool_ask_openai_once(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def ask_chatgpt(api_key, messages):
+        with lock:
+            calls.append(1)
+        time.sleep(0.05)
+        return "answer"
+
+    monkeypatch.setattr(gpt, "ask_chatgpt", ask_chatgpt)
+    cache = ChatAnswerCache(answers_per_key=1)
+
+    with ThreadPoolExecutor(8) as executor:
+        answers = list(executor.map(lambda _: cache.ask("key", MESSAGES, "scene"), range(8)))
+
+    assert answers == ["answer"] * 8
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (7, 1)
+    # the lock of the key is gone once nobody waits for it
+    assert len(cache._key_locks) == 0
+
+
+def test_concurrent_misses_of_the_shared_cache_load_once():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return {"scene": 1}
+
+    cache = SharedCache(ttl=60)
+    with ThreadPoolExecutor(8) as executor:
+        values = list(executor.map(lambda _: cache.get_or_load("scene", loader), range(8)))
+
+    assert values == [{"scene": 1}] * 8
+    assert len(loads) == 1
+    assert len(cache._key_locks) == 0
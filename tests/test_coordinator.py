@@ -0,0 +1,98 @@
+import time
+
+import pytest
+import requests
+
+from model.account import AccountRecord
+from model.coordinator import CoordinatorServer, RemoteWorkTable, WorkTable, account_id
+
+TOKEN = "s3cret"
+
+
+def accounts(count: int) -> list[AccountRecord]:
+    return [AccountRecord(index, f"0x{index:064x}", f"proxy{index}") for index in range(count)]
+
+
+@pytest.fixture
+def table(tmp_path):
+    table = WorkTable(str(tmp_path / "work.sqlite"), lease_seconds=0.3)
+    table.seed(accounts(4))
+    return table
+
+
+@pytest.fixture
+def coordinator(table):
+    server = CoordinatorServer(table, "127.0.0.1", 0, TOKEN)
+    server.start()
+    yield f"http://127.0.0.1:{server.address[1]}"
+    server.shutdown()
+
+
+def test_seed_is_idempotent(table):
+    assert table.seed(accounts(6)) == 2
+    assert table.stats()["pending"] == 6
+
+
+def test_expired_lease_goes_to_another_worker(table):
+    first = table.lease("dead", 2)
+    assert [account.index for account in first] == [0, 1]
+
+    time.sleep(0.4)
+    second = table.lease("alive", 4)
+
+    # untouched accounts first, the ones of the dead worker were attempted once already
+    assert [account.index for account in second] == [2, 3, 0, 1]
+    assert not table.complete("dead", account_id(first[0].private_key), True)
+    assert table.complete("alive", account_id(first[0].private_key), True, "0xabc")
+    assert table.stats() == {"pending": 0, "leased": 3, "done": 1, "failed": 0}
+
+
+def test_heartbeat_keeps_the_lease(table):
+    leased = table.lease("worker", 1)
+    ids = [account_id(account.private_key) for account in leased]
+    for _ in range(3):
+        time.sleep(0.15)
+        assert table.heartbeat("worker", ids) == 1
+
+    assert [account.index for account in table.lease("other", 4)] == [1, 2, 3]
+
+
+def test_remote_lease_expiry_and_stale_complete(coordinator):
+    dead = RemoteWorkTable(coordinator, TOKEN)
+    alive = RemoteWorkTable(coordinator, TOKEN)
+
+    leased = dead.lease("dead", 1)
+    assert [(account.index, account.proxy) for account in leased] == [(0, "proxy0")]
+
+    time.sleep(0.4)
+    taken = alive.lease("alive", 4)
+    assert [account.index for account in taken] == [1, 2, 3, 0]
+
+    item = account_id(leased[0].private_key)
+    assert dead.complete("dead", item, True) is False
+    assert alive.complete("alive", item, False, result="failed at tasks") is True
+    assert alive.stats()["failed"] == 1
+
+
+def test_requests_without_the_token_are_refused(coordinator):
+    assert requests.post(f"{coordinator}/lease", json={"worker": "w", "count": 4}, timeout=5).status_code == 403
+    assert requests.get(f"{coordinator}/stats", headers={"X-Coordinator-Token": "wrong"}, timeout=5).status_code == 403
+
+
+def test_token_is_required_off_loopback(table):
+    with pytest.raises(ValueError):
+        CoordinatorServer(table, "0.0.0.0", 0)
+
+    server = CoordinatorServer(table, "127.0.0.1", 0)
+    server.start()
+    server.shutdown()
+
+
+def test_plain_http_never_leaves_the_host(table):
+    with pytest.raises(ValueError, match="plain HTTP"):
+        CoordinatorServer(table, "0.0.0.0", 0, TOKEN)
+    with pytest.raises(ValueError, match="private keys"):
+        RemoteWorkTable("http://10.0.0.5:8765", TOKEN)
+
+    RemoteWorkTable("https://coordinator.example:8765", TOKEN)
+    RemoteWorkTable("http://localhost:8765", TOKEN)
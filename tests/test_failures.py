@@ -0,0 +1,26 @@
+from extra import failures
+from model.account import AccountRecord
+
+
+def test_only_the_latest_outcome_of_an_account_and_task_counts(tmp_path):
+    path = str(tmp_path / "failures.jsonl")
+    account = AccountRecord(0, "0x01", "proxy")
+    other = AccountRecord(1, "0x02")
+
+    failures.record_failure(account, 5, "bridge", TimeoutError("deposit did not arrive"), path)
+    failures.record_failure(other, 5, "withdraw", Exception("binance down"), path)
+    failures.record_success(account, 5, path)
+    assert [record["index"] for record in failures.unresolved_failures(path)] == [1]
+
+    failures.record_failure(account, 5, "tasks", Exception("chat failed"), path)
+    failures.record_success(account, 1, path)
+    unresolved = {record["index"]: record for record in failures.unresolved_failures(path)}
+
+    assert sorted(unresolved) == [0, 1]
+    # the rerun starts from the stage of the last failure, not the first one
+    assert unresolved[0]["stage"] == "tasks"
+    assert unresolved[0]["error_class"] == "Exception"
+
+
+def test_missing_index_has_no_failures(tmp_path):
+    assert failures.unresolved_failures(str(tmp_path / "none.jsonl")) == []
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from model import limiter
+from model.limiter import AdaptiveLimiter, endpoint_limiter, get_limiter, limited
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limiter.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_healthy_responses_raise_the_limit_additively(clock):
+    adaptive = AdaptiveLimiter("api", initial=4, max_limit=5)
+    for _ in range(4):
+        adaptive.acquire()
+        adaptive.release(0.1, overloaded=False)
+    # +1/limit per response: about one step per round of `limit` responses
+    assert 4.9 < adaptive.limit < 5
+
+    for _ in range(20):
+        adaptive.acquire()
+        adaptive.release(0.1, overloaded=False)
+    assert adaptive.limit == 5
+
+
+def test_overload_halves_once_per_second(clock):
+    adaptive = AdaptiveLimiter("api", initial=16, min_limit=2)
+    for _ in range(3):
+        adaptive.acquire()
+        adaptive.release(0.1, overloaded=True)
+    assert adaptive.limit == 8
+
+    for _ in range(3):
+        clock[0] += 1
+        adaptive.acquire()
+        adaptive.release(0.1, overloaded=True)
+    assert adaptive.limit == 2
+
+
+def test_slow_responses_shrink_the_limit_before_errors(clock):
+    adaptive = AdaptiveLimiter("api", initial=10, latency_tolerance=3)
+    adaptive.acquire()
+    adaptive.release(0.1, overloaded=False)
+    clock[0] += 1
+    adaptive.acquire()
+    adaptive.release(1.0, overloaded=False)
+    assert adaptive.limit < 10
+    assert adaptive.best_latency == pytest.approx(0.1 * 0.99 + 1.0 * 0.01)
+
+
+def test_acquire_blocks_at_the_limit():
+    adaptive = AdaptiveLimiter("api", initial=1)
+    adaptive.acquire()
+    entered = threading.Event()
+
+    def second():
+        adaptive.acquire()
+        entered.set()
+
+    threading.Thread(target=second, daemon=True).start()
+    assert not entered.wait(0.1)
+    adaptive.release(0.1, overloaded=False)
+    assert entered.wait(1)
+
+
+def test_endpoints_share_settings_but_not_state():
+    limiter.configure({"concurrency": {"default": {"initial": 3}, "xterio_api": {"initial": 20}}})
+    chat = get_limiter(endpoint_limiter("xterio_api", "/ai/v1/chat"))
+    tasks = get_limiter(endpoint_limiter("xterio_api", "/ai/v1/task"))
+
+    assert chat is not tasks
+    assert chat.limit == tasks.limit == 20
+    assert get_limiter(endpoint_limiter("rpc_bsc", "eth_call")).limit == 3
+    limiter.configure({})
+
+
+def test_limited_reports_endpoint_failures_only():
+    limiter.configure({})
+    name = endpoint_limiter("xterio_api", "/test")
+    with pytest.raises(ValueError):
+        with limited(name):
+            raise ValueError("bad request")
+    assert get_limiter(name).limit > 10
+
+    with pytest.raises(TimeoutError):
+        with limited(name):
+            raise TimeoutError()
+    assert get_limiter(name).limit < 10
+    assert get_limiter(name).in_flight == 0
+    limiter.configure({})
+
+
+def test_endpoints_of_a_dependency_share_its_limit():
+    limiter.configure({"concurrency": {"xterio_api": {"initial": 2, "max": 2}}})
+    chat, tasks = endpoint_limiter("xterio_api", "/ai/v1/chat"), endpoint_limiter("xterio_api", "/ai/v1/task")
+    release = threading.Event()
+    entered = threading.Semaphore(0)
+
+    def call(name):
+        with limited(name):
+            entered.release()
+            release.wait(5)
+
+    threads = [threading.Thread(target=call, args=(name,), daemon=True) for name in (chat, tasks, tasks)]
+    for thread in threads:
+        thread.start()
+
+    assert entered.acquire(timeout=1) and entered.acquire(timeout=1)
+    # each path is below its own limit, the third call waits for the dependency
+    assert not entered.acquire(timeout=0.1)
+    assert get_limiter("xterio_api").in_flight == 2
+    release.set()
+    assert entered.acquire(timeout=1)
+    for thread in threads:
+        thread.join(1)
+    assert get_limiter("xterio_api").in_flight == 0
+    limiter.configure({})
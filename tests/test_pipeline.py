@@ -0,0 +1,82 @@
+import threading
+
+from model.account import AccountRecord
+from model.pipeline import DEFERRED, Pipeline, PipelineItem, Stage
+
+
+def run(stages, items, stop=None):
+    finished = {}
+
+    def on_finished(item, ok):
+        finished[item.account.index] = (ok, item.failed_stage, item.interrupted)
+
+    Pipeline(stages, on_finished, stop).run(items)
+    return finished
+
+
+def items(count):
+    return [PipelineItem(AccountRecord(index, f"key{index}"), None) for index in range(count)]
+
+
+def test_accounts_go_through_all_stages():
+    deferred = []
+
+    def bridge(item):
+        deferred.append(item)
+        return DEFERRED
+
+    stages = [Stage("withdraw", lambda item: True, 2), Stage("bridge", bridge, 2), Stage("tasks", lambda item: True, 1)]
+    pipeline_items = items(5)
+    finished = {}
+    pipeline = Pipeline(stages, lambda item, ok: finished.setdefault(item.account.index, ok))
+
+    def resume_all():
+        while len(finished) < 5:
+            while deferred:
+                pipeline.resume(deferred.pop(), "bridge", True)
+            threading.Event().wait(0.05)
+
+    threading.Thread(target=resume_all, daemon=True).start()
+    pipeline.run(pipeline_items)
+
+    assert finished == dict.fromkeys(range(5), True)
+
+
+def test_resume_before_handler_returns_is_not_lost():
+    pipeline = None
+
+    def bridge(item):
+        pipeline.resume(item, "bridge", True)
+        return DEFERRED
+
+    finished = {}
+    pipeline = Pipeline([Stage("bridge", bridge, 1)], lambda item, ok: finished.setdefault(item.account.index, ok))
+    pipeline.run(items(3))
+
+    assert finished == dict.fromkeys(range(3), True)
+
+
+def test_stop_interrupts_queued_and_deferred_accounts():
+    stop = threading.Event()
+
+    def bridge(item):
+        stop.set()
+        return DEFERRED
+
+    stages = [Stage("bridge", bridge, 1), Stage("tasks", lambda item: True, 1)]
+    finished = run(stages, items(3), stop)
+
+    # the first account was bridged and waits for its deposit, the rest never started
+    assert finished == {index: (False, "bridge", True) for index in range(3)}
+
+
+def test_failing_finish_callback_does_not_stall_the_run():
+    seen = []
+
+    def on_finished(item, ok):
+        seen.append(item.account.index)
+        raise OSError("disk full")
+
+    Pipeline([Stage("tasks", lambda item: True, 1)], on_finished).run(items(3))
+
+    assert sorted(seen) == [0, 1, 2]
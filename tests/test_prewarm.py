@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model.account import AccountRecord
+from model.prewarm import Prewarmer
+from model.xterio import Xterio
+
+
+@pytest.fixture
+def warmups(monkeypatch):
+    calls = []
+
+    def prewarm(self, timeout: float = 5):
+        calls.append((self.private_key, threading.get_ident()))
+        time.sleep(0.1)
+
+    monkeypatch.setattr(Xterio, "prewarm", prewarm)
+    return calls
+
+
+def accounts(count: int) -> list[AccountRecord]:
+    return [AccountRecord(index, f"0x{index + 1:064x}") for index in range(count)]
+
+
+def test_worker_runs_the_account_it_warmed(warmups):
+    prewarmer = Prewarmer({})
+    first, second, third = accounts(3)
+    for account in (first, second, third):
+        prewarmer.queue(account)
+
+    with ThreadPoolExecutor(1) as worker, ThreadPoolExecutor(1) as other:
+        worker.submit(prewarmer.warm_next).result()
+        # another worker that frees up first does not take the reserved account
+        taken_by_other = other.submit(prewarmer.take).result()
+        account, instance, warmed = worker.submit(prewarmer.take).result()
+        warm_thread = worker.submit(threading.get_ident).result()
+
+    assert taken_by_other[0] is second and not taken_by_other[2]
+    assert account is first and warmed
+    assert warmups == [(first.private_key, warm_thread)]
+    assert instance.private_key == first.private_key
+    prewarmer.close()
+
+
+def test_reserved_accounts_are_taken_when_nothing_else_is_queued(warmups):
+    prewarmer = Prewarmer({})
+    (only,) = accounts(1)
+    prewarmer.queue(only)
+
+    warmer = threading.Thread(target=prewarmer.warm_next)
+    warmer.start()
+    time.sleep(0.03)
+    started = time.monotonic()
+    account, _, warmed = prewarmer.take()
+
+    assert account is only
+    # warmed on another thread, so its connections can't be reused here
+    assert not warmed
+    assert time.monotonic() - started > 0.03, "take must wait for the running warm-up"
+    warmer.join()
+    prewarmer.close()
+
+
+def test_every_queued_account_is_taken_once(warmups):
+    prewarmer = Prewarmer({})
+    queued = accounts(20)
+    for account in queued:
+        prewarmer.queue(account)
+
+    def job(_):
+        prewarmer.warm_next()
+        return prewarmer.take()[0].index
+
+    with ThreadPoolExecutor(4) as executor:
+        taken = list(executor.map(job, range(20)))
+
+    assert sorted(taken) == list(range(20))
+    prewarmer.close()
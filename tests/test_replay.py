@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from eth_account import Account
+
+from extra import recorder
+from extra.recorder import ReplayResponse
+from model import gpt
+from model.api import Task, XterioApi
+from model.rpc import ReplayProvider
+
+
+def write_fixtures(path, entries):
+    with open(path, "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps({"latency": 0.01, **entry}) + "\n")
+
+
+@pytest.fixture
+def fixtures(tmp_path, monkeypatch):
+    path = tmp_path / "fixtures.jsonl"
+    write_fixtures(
+        path,
+        [
+            {
+                "kind": "http",
+                "key": "GET api.xter.io/ai/v1/task",
+                "status": 200,
+                "body": {"err_code": 0, "data": {"list": [{"ID": 7, "user_task": None}]}},
+            },
+            {
+                "kind": "rpc",
+                "key": "xterio batch",
+                "response": [
+                    {"jsonrpc": "2.0", "id": 2, "result": "0x2"},
+                    {"jsonrpc": "2.0", "id": 1, "result": "0x1"},
+                ],
+            },
+            {"kind": "value", "key": recorder.OPENAI_KEY, "value": "recorded answer"},
+            {"kind": "value", "key": recorder.CAPTCHA_KEY, "value": "<redacted>"},
+        ],
+    )
+    replay = recorder.Fixtures(str(path), speed=0)
+    monkeypatch.setattr(recorder, "fixtures", replay)
+    return replay
+
+
+def test_api_is_answered_from_fixtures(fixtures):
+    session = recorder.ReplaySession(fixtures)
+    api = XterioApi(session.request)
+
+    assert api.tasks() == [Task(7, [])]
+    # the last exchange of a key is repeated for further accounts
+    assert api.tasks() == [Task(7, [])]
+
+
+def test_batch_responses_are_sorted_by_id(fixtures):
+    provider = ReplayProvider("xterio", fixtures)
+
+    responses = provider.make_batch_request([("eth_getBalance", ["0x0", "latest"])] * 2)
+
+    assert [response["result"] for response in responses] == ["0x1", "0x2"]
+
+
+def test_openai_and_captcha_never_leave_the_process(fixtures, monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise AssertionError("replay reached a real service")
+
+    monkeypatch.setattr(gpt, "OpenAI", unreachable)
+
+    assert gpt.ask_chatgpt("", [{"role": "user", "content": "hi"}]) == "recorded answer"
+    assert recorder.stubbed(recorder.CAPTCHA_KEY, unreachable, secret=True) == "<redacted>"
+
+
+def test_secret_values_are_recorded_redacted(tmp_path, monkeypatch):
+    path = tmp_path / "recorded.jsonl"
+    monkeypatch.setattr(recorder, "recorder", recorder.Recorder(str(path)))
+
+    assert recorder.stubbed(recorder.CAPTCHA_KEY, lambda: "P1_token", secret=True) == "P1_token"
+    recorder.close()
+
+    entry = json.loads(path.read_text().splitlines()[0])
+    assert entry["key"] == recorder.CAPTCHA_KEY
+    assert entry["value"] == "<redacted>"
+
+
+def test_recording_of_one_account_replays_another(tmp_path, monkeypatch):
+    path = tmp_path / "recorded.jsonl"
+    recording = recorder.Recorder(str(path))
+    recorded, replayed = Account.create().address, Account.create().address
+
+    class Session:
+        def request(self, method, url, **kwargs):
+            return ReplayResponse(200, {"err_code": 0, "data": {"message": f"sign in {recorded}"}})
+
+    session = recorder.RecordingSession(Session(), recording)
+    assert XterioApi(session.request).challenge(recorded) == f"sign in {recorded}"
+    recording.close()
+
+    replay = recorder.ReplaySession(recorder.Fixtures(str(path), speed=0))
+    assert XterioApi(replay.request).challenge(replayed) == f"sign in {recorded}"
@@ -0,0 +1,157 @@
+import pytest
+
+from model import retry
+from model.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryableStatusError,
+    RetryPolicy,
+    is_endpoint_failure,
+    is_retryable,
+)
+
+
+class ProxyError(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(retry.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    monkeypatch.setattr(retry, "_breakers", {})
+    return retry._breakers
+
+
+def test_breaker_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # only the probe goes through while half open
+    assert not breaker.allow()
+
+
+def test_failed_probe_opens_again_and_success_closes(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=3, reset_timeout=30)
+    breaker.trip()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.remaining() == 30
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_wait_raises_while_open(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.wait(0)
+
+
+def test_delay_is_capped_exponential_with_full_jitter(monkeypatch):
+    policy = RetryPolicy(base_delay=1, max_delay=10, multiplier=2, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 8, 10]
+
+    policy.jitter = True
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: (low, high))
+    assert policy.delay(3) == (0, 4)
+
+
+def test_classification():
+    assert is_endpoint_failure(TimeoutError())
+    assert is_endpoint_failure(Exception("HTTP 503: upstream"))
+    assert not is_endpoint_failure(ProxyError("connection refused"))
+    assert not is_endpoint_failure(Exception("Failed to perform, curl: (56) CONNECT tunnel failed, response 407"))
+    assert is_retryable(CircuitOpenError())
+    assert not is_retryable(Exception("execution reverted"))
+    assert is_retryable(Exception("something odd"))
+
+
+def test_call_retries_and_records_on_the_breaker(monkeypatch, breakers):
+    policy = RetryPolicy(attempts=3)
+    monkeypatch.setattr(policy, "sleep", lambda attempt: None)
+    results = iter([TimeoutError("read timed out"), TimeoutError("read timed out"), "ok"])
+
+    def flaky():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert policy.call(flaky, endpoint="api.example") == "ok"
+    assert breakers["api.example"].failures == 0
+
+
+def test_call_stops_on_fatal_errors_and_proxy_errors_spare_the_breaker(monkeypatch, breakers):
+    policy = RetryPolicy(attempts=5)
+    monkeypatch.setattr(policy, "sleep", lambda attempt: None)
+    calls = []
+
+    def reverted():
+        calls.append(1)
+        raise Exception("execution reverted")
+
+    with pytest.raises(Exception, match="reverted"):
+        policy.call(reverted, endpoint="rpc.example")
+    assert len(calls) == 1
+
+    def proxy_down():
+        raise ProxyError("proxy refused")
+
+    with pytest.raises(ProxyError):
+        policy.call(proxy_down, endpoint="rpc.example", attempts=3)
+    assert breakers["rpc.example"].state == CircuitBreaker.CLOSED
+
+
+class Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = ""
+
+
+@pytest.mark.parametrize(
+    "error, retried",
+    [
+        (TimeoutError("Operation timed out after 120000 milliseconds with 0 bytes received"), False),
+        (RetryableStatusError(Response(502)), False),
+        (RetryableStatusError(Response(429)), True),
+        (RetryableStatusError(Response(503)), True),
+        (Exception("Failed to perform, curl: (7) Failed to connect to api.xter.io port 443"), True),
+    ],
+)
+def test_non_idempotent_calls_are_only_resent_when_they_never_arrived(monkeypatch, breakers, error, retried):
+    policy = RetryPolicy(attempts=3)
+    monkeypatch.setattr(policy, "sleep", lambda attempt: None)
+    calls = []
+
+    def post():
+        calls.append(1)
+        if len(calls) == 1:
+            raise error
+        return "ok"
+
+    if retried:
+        assert policy.call(post, endpoint="api.example", idempotent=False) == "ok"
+    else:
+        with pytest.raises(type(error)):
+            policy.call(post, endpoint="api.example", idempotent=False)
+    assert len(calls) == (2 if retried else 1)
@@ -0,0 +1,63 @@
+import datetime
+import threading
+import time
+
+from model.account import AccountRecord
+from model.scheduler import DueScheduler
+
+UTC = datetime.timezone.utc
+
+
+def account(index: int) -> AccountRecord:
+    return AccountRecord(index, f"0x{index:064x}")
+
+
+def test_offsets_are_stable_and_inside_the_spread():
+    scheduler = DueScheduler(spread_hours=6)
+    offsets = [scheduler.offset(account(index)) for index in range(200)]
+
+    assert offsets == [DueScheduler(spread_hours=6).offset(account(index)) for index in range(200)]
+    assert all(0 <= offset < 6 * 3600 for offset in offsets)
+    assert len(set(offsets)) > 190
+
+
+def test_first_and_next_due():
+    scheduler = DueScheduler()
+    record = account(1)
+    midnight = datetime.datetime(2026, 3, 1, tzinfo=UTC)
+    slot = midnight + datetime.timedelta(seconds=scheduler.offset(record))
+
+    assert scheduler.first_due(record, midnight) == slot
+    # an account whose slot has passed today runs right away
+    late = midnight + datetime.timedelta(hours=23, minutes=59, seconds=59)
+    assert scheduler.first_due(record, late) == max(slot, late)
+    assert scheduler.next_due(record, late) == slot + datetime.timedelta(days=1)
+
+
+def test_pop_due_returns_accounts_in_due_order():
+    scheduler = DueScheduler()
+    now = datetime.datetime.now(UTC)
+    scheduler.push(account(1), now - datetime.timedelta(seconds=1))
+    scheduler.push(account(2), now - datetime.timedelta(seconds=5))
+    scheduler.push(account(3), now + datetime.timedelta(hours=1))
+    stop = threading.Event()
+
+    assert [scheduler.pop_due(stop).index, scheduler.pop_due(stop).index] == [2, 1]
+    assert len(scheduler) == 1
+
+
+def test_pop_due_wakes_up_on_push_and_stop():
+    scheduler = DueScheduler()
+    stop = threading.Event()
+    popped = []
+    worker = threading.Thread(target=lambda: popped.append(scheduler.pop_due(stop)), daemon=True)
+    worker.start()
+
+    time.sleep(0.05)
+    scheduler.push(account(7), datetime.datetime.now(UTC))
+    worker.join(1)
+    assert [record.index for record in popped] == [7]
+
+    scheduler.push(account(8), datetime.datetime.now(UTC) + datetime.timedelta(hours=1))
+    threading.Timer(0.05, stop.set).start()
+    assert scheduler.pop_due(stop) is None
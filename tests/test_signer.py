@@ -0,0 +1,82 @@
+import os
+import random
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from model.signer import Signer
+
+KEYS = 200
+CHALLENGE = "Welcome to Xterio!\n\nNonce: 0123456789abcdef"
+
+
+def dynamic_fee_transaction(address: str, rng: random.Random) -> dict:
+    return {
+        "chainId": 112358,
+        "from": address,
+        "to": "0x7bb85350e3a883A1708648AB7e37cEf4651cFd48",
+        "value": rng.randrange(0, 10**18),
+        "data": "0xdc7d41f6" + os.urandom(64).hex(),
+        "nonce": rng.randrange(0, 1000),
+        "type": "0x2",
+        "maxFeePerGas": rng.randrange(10**9, 10**11),
+        "maxPriorityFeePerGas": rng.randrange(0, 10**9),
+        "gas": rng.randrange(21_000, 500_000),
+    }
+
+
+def legacy_transaction(address: str, rng: random.Random) -> dict:
+    return {
+        "chainId": 56,
+        "from": address,
+        "to": Account.create().address,
+        "value": rng.randrange(0, 10**18),
+        "data": "0x" + os.urandom(rng.randrange(0, 100)).hex(),
+        "nonce": rng.randrange(0, 1000),
+        "gasPrice": rng.randrange(10**9, 10**10),
+        "gas": rng.randrange(21_000, 500_000),
+    }
+
+
+def signers(private_key: str) -> list[Signer]:
+    signer = Signer(private_key)
+    eth_keys_signer = Signer(private_key)
+    eth_keys_signer._coincurve_key = None
+    return [signer, eth_keys_signer] if signer.backend == "coincurve" else [signer]
+
+
+def reference(transaction: dict, private_key: str):
+    unsigned = {key: value for key, value in transaction.items() if key != "from"}
+    return Account.sign_transaction(unsigned, private_key)
+
+
+@pytest.mark.parametrize("build", [dynamic_fee_transaction, legacy_transaction])
+def test_transactions_match_eth_account(build):
+    rng = random.Random(build.__name__)
+    for _ in range(KEYS):
+        private_key = "0x" + os.urandom(32).hex()
+        for signer in signers(private_key):
+            transaction = build(signer.address, rng)
+            signed = signer.sign_transaction(transaction)
+            expected = reference(transaction, private_key)
+            assert signed.raw_transaction == bytes(expected.raw_transaction), signer.backend
+            assert signed.hash == bytes(expected.hash), signer.backend
+
+
+def test_messages_match_eth_account():
+    for _ in range(KEYS):
+        private_key = "0x" + os.urandom(32).hex()
+        reference = bytes(Account.sign_message(encode_defunct(text=CHALLENGE), private_key).signature)
+        for signer in signers(private_key):
+            assert signer.sign_message(CHALLENGE) == reference, signer.backend
+
+
+def test_access_list_falls_back_to_eth_account():
+    private_key = "0x" + os.urandom(32).hex()
+    signer = Signer(private_key)
+    transaction = dynamic_fee_transaction(signer.address, random.Random(0))
+    transaction["accessList"] = [{"address": transaction["to"], "storageKeys": ["0x" + "00" * 32]}]
+
+    expected = reference(transaction, private_key)
+    assert signer.sign_transaction(transaction).raw_transaction == bytes(expected.raw_transaction)
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from extra.summary import is_failure, summarize
+
+
+def write_log(path, events):
+    path.write_text("".join(json.dumps(event) + "\n" for event in events))
+    return str(path)
+
+
+def test_only_failed_outcomes_are_failures():
+    for outcome in ("ok", "sent", "deferred", "skipped", "interrupted"):
+        assert not is_failure({"outcome": outcome})
+    for outcome in ("failed", "error", "reverted"):
+        assert is_failure({"outcome": outcome})
+
+
+def test_summarize_counts_stages_endpoints_and_errors(tmp_path):
+    path = write_log(
+        tmp_path / "run.jsonl",
+        [
+            {"stage": "bridge", "outcome": "sent", "account": 1, "latency": 1.0},
+            {"stage": "bridge", "outcome": "ok", "account": 1},
+            {"stage": "bridge", "outcome": "reverted", "account": 2, "error": "status 0"},
+            {"stage": "stage:bridge", "outcome": "deferred", "account": 3, "latency": 3.0},
+            {"stage": "stage:bridge", "outcome": "ok", "account": 4, "latency": 1.0},
+            {"stage": "api", "outcome": "ok", "endpoint": "api.xter.io/ai/v1/task", "latency": 0.2},
+            {"stage": "api", "outcome": "error", "endpoint": "api.xter.io/ai/v1/task", "latency": 0.4},
+        ],
+    )
+
+    summary = summarize(path)
+
+    assert summary["accounts"] == 4
+    # a sent transaction is counted once, by the event with its receipt
+    bridge = summary["stages"]["bridge"]
+    assert (bridge["total"], bridge["pending"]) == (2, 1)
+    assert bridge["success_rate"] == 0.5
+    assert bridge["errors"] == {"status 0": 1}
+    stage = summary["stages"]["stage:bridge"]
+    assert (stage["total"], stage["pending"], stage["success_rate"]) == (1, 1, 1.0)
+    assert stage["avg"] == pytest.approx(2.0)
+    endpoint = summary["endpoints"]["api.xter.io/ai/v1/task"]
+    assert endpoint["success_rate"] == 0.5
+    assert endpoint["avg"] == pytest.approx(0.3)
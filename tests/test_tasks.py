@@ -0,0 +1,101 @@
+import datetime
+import threading
+
+import pytest
+
+from model import tasks
+from model.api import UserTask
+from model.tasks import TASKS, TaskSpec, TaskState, format_api_time, run_due_tasks
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+TODAY = format_api_time(NOW)
+YESTERDAY = format_api_time(NOW - datetime.timedelta(days=1))
+
+
+class FakeXterio:
+    address = "0xabc"
+    config = {"invite": {"invite_codes": ["CODE"]}}
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, task_id):
+        with self._lock:
+            self.calls.append((task_id, threading.current_thread() is threading.main_thread()))
+        return task_id not in self.fail
+
+    def apply_invite_code(self, code):
+        return self._record(16)
+
+    def send_chat_messages(self):
+        return self._record(11)
+
+    def complete_task(self, task_id):
+        return self._record(task_id)
+
+
+def state(task_id: int, *updated: str) -> TaskState:
+    return TaskState(task_id, [UserTask(value) for value in updated])
+
+
+def test_is_due():
+    daily = TaskSpec(11, None, daily=True)
+    once = TaskSpec(20, None)
+
+    assert daily.is_due(state(11))
+    assert daily.is_due(state(11, YESTERDAY))
+    assert not daily.is_due(state(11, YESTERDAY, TODAY))
+    assert once.is_due(state(20))
+    assert not once.is_due(state(20, YESTERDAY))
+
+
+def test_done_tasks_are_skipped_and_sequential_ones_run_first():
+    xterio = FakeXterio()
+    states = {task_id: state(task_id) for task_id in TASKS}
+    states[16] = state(16, YESTERDAY)
+    states[18] = state(18, TODAY)
+
+    run_due_tasks(xterio, states, lambda: None)
+
+    ran = [task_id for task_id, _ in xterio.calls]
+    assert sorted(ran) == [11, 20, 21, 22, 23, 24]
+    # the chat runs alone in the calling thread before the reports go to the pool
+    assert xterio.calls[0] == (11, True)
+    assert all(not main_thread for _, main_thread in xterio.calls[1:])
+
+
+def test_tasks_the_api_does_not_list_are_not_run():
+    xterio = FakeXterio()
+    run_due_tasks(xterio, {20: state(20)}, lambda: None)
+    assert xterio.calls == [(20, False)]
+
+
+def test_failed_dependency_skips_dependents(monkeypatch):
+    registry = {
+        1: TaskSpec(1, lambda xterio, task_id: xterio.complete_task(task_id)),
+        2: TaskSpec(2, lambda xterio, task_id: xterio.complete_task(task_id), depends_on=(1,)),
+        3: TaskSpec(3, lambda xterio, task_id: xterio.complete_task(task_id), depends_on=(2,)),
+    }
+    monkeypatch.setattr(tasks, "TASKS", registry)
+    xterio = FakeXterio(fail={1})
+
+    run_due_tasks(xterio, {task_id: state(task_id) for task_id in registry}, lambda: None)
+
+    assert [task_id for task_id, _ in xterio.calls] == [1]
+
+
+@pytest.mark.parametrize("done", [True, False])
+def test_dependency_done_earlier_does_not_block(monkeypatch, done):
+    registry = {
+        1: TaskSpec(1, lambda xterio, task_id: xterio.complete_task(task_id)),
+        2: TaskSpec(2, lambda xterio, task_id: xterio.complete_task(task_id), depends_on=(1,)),
+    }
+    monkeypatch.setattr(tasks, "TASKS", registry)
+    xterio = FakeXterio()
+    states = {1: state(1, YESTERDAY) if done else state(1), 2: state(2)}
+
+    run_due_tasks(xterio, states, lambda: None)
+
+    assert [task_id for task_id, _ in xterio.calls] == ([2] if done else [1, 2])